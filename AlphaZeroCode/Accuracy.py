@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title Accuracy
+
+""" Accuracy """
+import time
+import numpy as np
+import torch
+from . Node import Node
+from . Util import Util
+from . Solver import Solver, MAX_WIDTH
+
+
+class Accuracy():
+    """
+    完全解析表 (Solver) を正解として、ネットワークの精度を全局面まとめて測る
+    policy_accuracy: 合法手に限った方策の最大の手が最善手の集合に入る割合 (top-1一致率)
+    value_mse: 価値の出力と正確な価値 (手番側から見た 1, 0, -1) の平均二乗誤差
+
+    終局していない全局面 (3x3で4520局面) を大きなバッチで推論するので、対局で評価するよりずっと速い
+    CFG.accuracy_num_position を設定した場合は、その数だけサンプリングした局面で測る
+    局面履歴は現在の盤面だけで、それより前の履歴 (history_size > 1) は空の盤面とする
+
+    完全解析表を作れない盤 (board_width > 3) では、正解付きの局面を test_set で渡す
+    test_set: (盤面 [N, 幅, 幅], 最善手のマスク [N, 幅 * 幅] (bool), 手番側から見た価値 [N]) か、
+    同じ配列を states, best, values として保存した .npz のパス (CFG.accuracy_test_path)
+    手番は石の数から求める
+
+    Usage:
+    accuracy = Accuracy(CFG)
+    result = accuracy(model)
+    accuracy.show_result(result)
+    """
+    def __init__(self, CFG, solver=None, num_position=None, batch_size=None, seed=0, test_set=None):
+        self.CFG = CFG
+        self.util = Util(CFG)
+
+        if test_set is None:
+            test_set = getattr(CFG, 'accuracy_test_path', None)
+        if isinstance(test_set, str):
+            with np.load(test_set) as data:
+                test_set = (data['states'], data['best'], data['values'])
+        self.test_set = test_set
+
+        if test_set is None and solver is None:
+            if CFG.board_width > MAX_WIDTH:
+                raise ValueError('Accuracy: no full table for board_width {} (max {}); '
+                                 'pass test_set or set CFG.accuracy_test_path'.format(CFG.board_width, MAX_WIDTH))
+            solver = Solver(CFG)
+        self.solver = solver
+
+        if num_position is None:
+            num_position = getattr(CFG, 'accuracy_num_position', None)
+        self.num_position = num_position
+
+        if batch_size is None:
+            batch_size = getattr(CFG, 'accuracy_batch_size', 1024)
+        self.batch_size = batch_size
+        self.seed = seed
+
+        """ 入力特徴と正解 (最初の呼び出しで作成) """
+        self.features = None
+
+    def build(self):
+        """ 局面の入力特徴、合法手、最善手、正確な価値 """
+        if self.test_set is None:
+            states, best_cells, values = self.solve()
+        else:
+            states, best_cells, values = self.test_set
+            states = np.asarray(states)
+            best_cells = np.asarray(best_cells, dtype=bool).reshape(len(states), -1)
+            values = np.asarray(values, dtype=np.float32)
+
+            if self.num_position is not None and self.num_position < len(states):
+                rng = np.random.default_rng(self.seed)
+                index = np.sort(rng.choice(len(states), self.num_position, replace=False))
+                states, best_cells, values = states[index], best_cells[index], values[index]
+
+        features = []
+        legal = np.zeros((len(states), self.CFG.action_size), dtype=bool)
+        best = np.zeros((len(states), self.CFG.action_size), dtype=bool)
+
+        for i, state in enumerate(states):
+            state = np.asarray(state).tolist()
+
+            """ 推論と同じ入力特徴 (Util.state2feature) """
+            node = Node(self.CFG, state)
+            node.player = self.player(state)
+            features.append(self.util.state2feature(node).cpu())
+
+            cells = np.asarray(state).reshape(-1)
+            legal[i, :cells.size] = cells == 0
+            best[i, :cells.size] = best_cells[i, :cells.size]
+
+        self.features = torch.cat(features)
+        self.legal = torch.from_numpy(legal)
+        self.best = torch.from_numpy(best)
+        self.values = torch.from_numpy(values)
+
+    def solve(self):
+        """ 完全解析表から (盤面, 最善手のマスク, 価値) を作る """
+        codes = self.solver.positions()
+
+        if self.num_position is not None and self.num_position < len(codes):
+            rng = np.random.default_rng(self.seed)
+            codes = np.sort(rng.choice(codes, self.num_position, replace=False))
+
+        size = self.CFG.board_width * self.CFG.board_width
+        states = [self.solver.decode(code) for code in codes]
+        best = np.array([(self.solver.best_mask(state) >> np.arange(size)) & 1 == 1 for state in states],
+                        dtype=bool).reshape(len(states), size)
+        values = np.array([self.solver.value(state) for state in states], dtype=np.float32)
+
+        return states, best, values
+
+    def player(self, state):
+        """ 石の数から手番を求める """
+        cells = np.asarray(state).reshape(-1)
+        num_first = int(np.sum(cells == self.CFG.first_player))
+        num_second = int(np.sum(cells == self.CFG.second_player))
+        return self.CFG.first_player if num_first == num_second else self.CFG.second_player
+
+    def __call__(self, model):
+        if self.features is None:
+            self.build()
+
+        start = time.perf_counter()
+
+        """ 学習中のモデルでも推論モードで測り、元のモードに戻す """
+        training = model.training
+        model.eval()
+
+        p, v = [], []
+        with torch.no_grad():
+            for i in range(0, len(self.features), self.batch_size):
+                features = self.features[i:i + self.batch_size].to(self.CFG.device)
+                p_batch, v_batch = model(features)
+                p.append(p_batch.float().cpu())
+                v.append(v_batch.float().cpu().reshape(-1))
+
+        model.train(training)
+
+        p = torch.cat(p).masked_fill(~self.legal, -1.0)
+        v = torch.cat(v)
+
+        actions = p.argmax(dim=1)
+        correct = self.best.gather(1, actions.unsqueeze(1)).squeeze(1)
+
+        return {
+            'positions': len(self.values),
+            'policy_accuracy': correct.float().mean().item(),
+            'value_mse': (v - self.values).pow(2).mean().item(),
+            'time': time.perf_counter() - start,
+        }
+
+    def show_result(self, result):
+        print('accuracy: positions {}  policy top-1 {:.1%}  value mse {:.4f}  ({:.2f}s)'
+              .format(result['positions'], result['policy_accuracy'], result['value_mse'], result['time']))
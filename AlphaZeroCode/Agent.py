@@ -6,6 +6,8 @@ import random
 import copy
 from .Util import Util
 from .MCTS import MCTS
+from .Solver import Solver
+from .AlphaBeta import AlphaBeta
 
 
 class Agent:
@@ -18,6 +20,12 @@ class Agent:
         self.mcts = MCTS(env, model, CFG, train)
         self.util = Util(CFG)
 
+        """ 完全解析表 (player_perfect の初回に作成) """
+        self.solver = None
+
+        """ アルファベータ探索 (player_alphabeta の初回に作成) """
+        self.alphabeta = None
+
     def alpha_zero(self, node, play_count=1):
         next_node = self.mcts(node, play_count)
         return next_node
@@ -44,6 +52,13 @@ class Agent:
         action = random.choice(legal_actions)
         return action
 
+    def player_perfect(self, env, player=None):
+        """ 完全解析表から最善手を取得 (最善手が複数ある場合はランダム) """
+        if self.solver is None:
+            self.solver = Solver(self.CFG)
+
+        return random.choice(self.solver.best_actions(env.state))
+
     """ 
     Minimaxプレーヤーで最善の手を取得 
     """
@@ -123,90 +138,12 @@ class Agent:
         return best_action  # 最善の行動インデックスを返却
 
     """
-    Alpha-betaプレーヤーで最善の手を取得 
+    Alpha-betaプレーヤーで最善の手を取得
+    反復深化・置換表・手の順序付けを行う AlphaBeta で探索する (置換表は手番をまたいで再利用)
     """
 
-    def player_alphabeta(self, env, player):
-
-        """ 
-        Alpha–beta pruning
-        """
-
-        def alphabeta(env, α, β, player):
-
-            """ ゲーム終了の場合 """
-            if env.done:
-                # print('reward', env.reward)
-                return env.reward  # 報酬: -1, 0, 1
-
-            """ 合法手の取得 """
-            legal_actions = env.get_legal_actions(env.state)
-
-            """
-            先手にとっては最大となる価値（報酬）を選ばせ、
-            後手にとっては最小となる価値（報酬）を選ばせる。
-            """
-            if player == 1:
+    def player_alphabeta(self, env, player=None):
+        if self.alphabeta is None:
+            self.alphabeta = AlphaBeta(self.CFG)
 
-                value = -float('inf')  # 状態価値に−∞を設定 float('inf')
-
-                """ 合法手で最大値を取得 """
-                for action in legal_actions:
-                    child = copy.deepcopy(env)  # 環境のコピー
-                    child.step(action)  # コピーで実行
-                    value = max(value, alphabeta(child, α, β, -player))  # 現在の価値とalphabetaの価値のうち大きい方を取得
-                    if value >= β:
-                        # print('β cutoff')
-                        break
-                    α = max(α, value)  # 最大値を返却
-
-                # return value 
-                return value / 2
-
-            else:
-
-                value = float('inf')  # ∞
-
-                for action in legal_actions:
-                    child = copy.deepcopy(env)  # 環境のコピー
-                    child.step(action)  # コピーで実行
-                    value = min(value, alphabeta(child, α, β, -player))
-                    if value <= α:
-                        # print('α cutoff')
-                        break
-                    β = min(β, value)
-                # return value  
-                return value / 2
-
-        """ 最善手と状態価値を初期化 """
-        best_action = 0
-        best_value = -float('inf')
-
-        """ αとβを初期化 """
-        α = -float('inf')
-        β = float('inf')
-
-        """ 合法手でループ """
-        legal_actions = env.get_legal_actions(env.state)
-        # print('legal_actions', legal_actions)
-
-        for action in legal_actions:
-
-            child = copy.deepcopy(env)
-            child.step(action)
-
-            """ 
-            Alpha-betaアルゴリズムで探索して、状態価値を取得。
-            後手の価値を先手にとってはマイナスの価値とする。
-            """
-            value = -alphabeta(child, α, β, -player)
-
-            """ 取得した価値が最善の場合よりも大きい場合は値を交換 """
-            if value > best_value:
-                best_value = value  # 取得した価値を最善の価値に設定
-                best_action = action  # その場合の行動を最善の行動とする
-
-            # print('action: ', action, value)
-
-        # print('best_action', best_action)
-        return best_action  # 最善の行動インデックスを返却
+        return self.alphabeta(env)
@@ -0,0 +1,262 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title AlphaBeta
+
+""" AlphaBeta """
+import time
+import numpy as np
+from . Zobrist import Zobrist
+
+
+""" 勝ちの評価値 (早く勝つほど大きく、遅く負けるほど大きくなるよう手数を引く) """
+WIN = 10000
+
+""" 置換表の値の種類 """
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class AlphaBeta():
+    """
+    反復深化のアルファベータ探索 (ネガマックス、手番側から見た評価値)
+    - 置換表: Zobristハッシュをキーに (深さ, 評価値, 種類, 最善手) を保持し、着手ごとに差分で更新
+    - 手の順序: 置換表の最善手 → キラー手 (深さごとに2手) → ヒストリー (βカットした手の得点順)
+    - 局面は env.push / env.pop で進めて戻す (環境のコピーを作らない)
+    - 予算: 探索ノード数 (CFG.alphabeta_max_nodes) と時間 (CFG.alphabeta_time_limit 秒)
+      予算を使い切ったら、最後に完了した深さの最善手を返す
+    終局まで読めない深さでは評価値 0 (引き分け) とする
+
+    Usage:
+    engine = AlphaBeta(CFG)
+    action = engine(env)
+    engine.show_stats()
+    """
+    def __init__(self, CFG, max_depth=None, max_nodes=None, time_limit=None, max_mb=None):
+        self.CFG = CFG
+        self.size = CFG.board_width * CFG.board_width
+
+        if max_depth is None:
+            max_depth = getattr(CFG, 'alphabeta_max_depth', self.size)
+        if max_nodes is None:
+            max_nodes = getattr(CFG, 'alphabeta_max_nodes', None)
+        if time_limit is None:
+            time_limit = getattr(CFG, 'alphabeta_time_limit', None)
+        if max_mb is None:
+            max_mb = getattr(CFG, 'alphabeta_table_mb', 16)
+
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+        self.time_limit = time_limit
+
+        """ 置換表 (1エントリのおおよそのバイト数で上限を決め、溢れたら全て捨てる) """
+        entry_bytes = 200
+        self.max_size = max(int(max_mb * 1024 * 1024 // entry_bytes), 1)
+        self.table = {}
+
+        """ 盤面の差分更新用の乱数テーブル (現在の局面の面だけを使う) """
+        zobrist = Zobrist(CFG)
+        self.pieces = {1: zobrist.table[0, 0].tolist(), -1: zobrist.table[0, 1].tolist()}
+        self.turn = int(zobrist.turn)
+
+        """ 手の順序付け """
+        self.killers = [[None, None] for _ in range(self.size + 1)]
+        self.history = {1: [0] * self.size, -1: [0] * self.size}
+
+        """ 統計 """
+        self.nodes = 0
+        self.depth = 0
+        self.score = 0
+        self.elapsed = 0.0
+
+    def __call__(self, env):
+        """ 現在の局面の最善手 """
+        action, _score = self.search(env)
+        return action
+
+    def key(self, env):
+        """ 現在の局面と手番のハッシュ値 """
+        cells = np.asarray(env.state).reshape(-1)
+        key = 0
+        for action in np.flatnonzero(cells):
+            key ^= self.pieces[int(cells[action])][action]
+        if env.player == -1:
+            key ^= self.turn
+        return key
+
+    def search(self, env):
+        """ 反復深化: 深さ1から読み、予算内で完了した最も深い探索の (最善手, 評価値) を返す """
+        self.nodes = 0
+        self.stopped = False
+        self.start = time.perf_counter()
+        self.deadline = None if self.time_limit is None else self.start + self.time_limit
+
+        """ ヒストリーは前の手番の値を半分だけ引き継ぐ """
+        for player in self.history:
+            self.history[player] = [h // 2 for h in self.history[player]]
+        self.killers = [[None, None] for _ in range(self.size + 1)]
+
+        legal_actions = [int(a) for a in env.get_legal_actions()]
+        best_action = legal_actions[0] if len(legal_actions) > 0 else getattr(self.CFG, 'pass_', None)
+        best_score = 0
+
+        key = self.key(env)
+        self.root_action = None
+        max_depth = min(self.max_depth, len(legal_actions))
+
+        for depth in range(1, max_depth + 1):
+            score = self.negamax(env, key, depth, 0, -WIN - 1, WIN + 1)
+
+            if self.stopped:
+                break
+
+            """ ルートは全幅の窓で読むので、最善手は置換表ではなくこの探索の正確な結果から取る """
+            if self.root_action is not None:
+                best_action = self.root_action
+            best_score = score
+            self.depth = depth
+
+            """ 勝敗が確定したら、それ以上深く読んでも変わらない """
+            if abs(score) > WIN - self.size - 1:
+                break
+
+        self.score = best_score
+        self.elapsed = time.perf_counter() - self.start
+
+        return best_action, best_score
+
+    def negamax(self, env, key, depth, ply, alpha, beta):
+        self.nodes += 1
+
+        if self.out_of_budget():
+            self.stopped = True
+            return 0
+
+        alpha_orig = alpha
+
+        """
+        置換表の参照 (勝敗の評価値は、この局面からの手数に直して保持)
+        ルートでは前の手番で保存した値で打ち切ったり窓を狭めたりせず、最善手を手の順序付けにだけ使う
+        """
+        entry = self.table.get(key)
+        tt_action = None
+        if entry is not None:
+            entry_depth, score, flag, tt_action = entry
+            if ply > 0 and entry_depth >= depth:
+                score = self.from_table(score, ply)
+                if flag == EXACT:
+                    return score
+                if flag == LOWER:
+                    alpha = max(alpha, score)
+                elif flag == UPPER:
+                    beta = min(beta, score)
+                if alpha >= beta:
+                    return score
+
+        legal_actions = env.get_legal_actions()
+        if len(legal_actions) == 0 or depth == 0:
+            return 0
+
+        player = env.player
+        best_score = -WIN - 1
+        best_action = None
+
+        for action in self.order(legal_actions, tt_action, ply, player):
+            _state, reward, done = env.push(action)
+
+            if done:
+                """ 終局: 報酬は勝った側のプレーヤー (引き分けは0) """
+                score = WIN - ply - 1 if reward == player else (0 if reward == 0 else -(WIN - ply - 1))
+            else:
+                child_key = key ^ self.pieces[player][action] ^ self.turn
+                score = -self.negamax(env, child_key, depth - 1, ply + 1, -beta, -alpha)
+
+            env.pop()
+
+            if self.stopped:
+                return 0
+
+            if score > best_score:
+                best_score = score
+                best_action = action
+
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                """ βカット: キラー手とヒストリーを更新 """
+                if action != self.killers[ply][0]:
+                    self.killers[ply] = [action, self.killers[ply][0]]
+                self.history[player][action] += depth * depth
+                break
+
+        if best_score <= alpha_orig:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+
+        if ply == 0:
+            self.root_action = best_action
+
+        if len(self.table) >= self.max_size:
+            self.table.clear()
+        self.table[key] = (depth, self.to_table(best_score, ply), flag, best_action)
+
+        return best_score
+
+    def order(self, legal_actions, tt_action, ply, player):
+        """ 置換表の最善手、キラー手、ヒストリーの得点の順に並べる """
+        history = self.history[player]
+        killers = self.killers[ply]
+
+        def priority(action):
+            if action == tt_action:
+                return 3 * WIN * WIN
+            if action == killers[0]:
+                return 2 * WIN * WIN
+            if action == killers[1]:
+                return WIN * WIN
+            return history[action]
+
+        return sorted((int(a) for a in legal_actions), key=priority, reverse=True)
+
+    def to_table(self, score, ply):
+        """ 勝敗の評価値を、ルートからの手数ではなくこの局面からの手数で保持 """
+        if score > WIN - self.size - 1:
+            return score + ply
+        if score < -(WIN - self.size - 1):
+            return score - ply
+        return score
+
+    def from_table(self, score, ply):
+        if score > WIN - self.size - 1:
+            return score - ply
+        if score < -(WIN - self.size - 1):
+            return score + ply
+        return score
+
+    def out_of_budget(self):
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            return True
+
+        """ 時刻の確認は256ノードごと """
+        if self.deadline is not None and self.nodes % 256 == 0:
+            return time.perf_counter() > self.deadline
+
+        return False
+
+    @property
+    def nodes_per_sec(self):
+        return self.nodes / self.elapsed if self.elapsed > 0 else 0.0
+
+    def stats(self):
+        return {
+            'nodes': self.nodes,
+            'depth': self.depth,
+            'score': self.score,
+            'time': self.elapsed,
+            'nodes_per_sec': self.nodes_per_sec,
+            'table_size': len(self.table),
+        }
+
+    def show_stats(self):
+        print('alphabeta: depth {}  score {}  nodes {:,}  {:.3f}s  {:,.0f} nodes/sec  table {:,}'
+              .format(self.depth, self.score, self.nodes, self.elapsed, self.nodes_per_sec, len(self.table)))
@@ -0,0 +1,287 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title Arena
+
+""" Arena """
+import copy
+import math
+import time
+import numpy as np
+import torch
+from . MCTS import MCTS, Node
+from . Util import Util
+
+
+def elo_from_score(score):
+    """ 期待得点 (0〜1) からElo差 """
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+
+def score_from_elo(elo):
+    """ Elo差から期待得点 """
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def sprt_llr(wins, draws, losses, elo0, elo1):
+    """
+    GSPRT の対数尤度比 (勝ち/引き分け/負けの3項分布を正規近似)
+    H0: Elo差 = elo0, H1: Elo差 = elo1
+    """
+    n = wins + draws + losses
+    if n == 0:
+        return 0.0
+
+    score = (wins + 0.5 * draws) / n
+    var = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / n
+    if var <= 0:
+        return 0.0
+
+    s0, s1 = score_from_elo(elo0), score_from_elo(elo1)
+    return n * (s1 - s0) * (2 * score - s0 - s1) / (2 * var)
+
+
+class Arena():
+    """
+    2つのモデルの対戦で昇格を判定する (model1 が挑戦者、model2 が現行モデル)
+    ParallelSelfPlay と同じく複数局を同時に進め、手番側のモデルごとにリーフの推論を1回のバッチにまとめる
+    先後は1局ごとに入れ替え、1局終わるたびに SPRT で判定し、決着したらその時点で打ち切る
+
+    CFG.arena_elo0, CFG.arena_elo1: SPRT の仮説 H0, H1 のElo差 (既定 0, 50)
+    CFG.arena_alpha, CFG.arena_beta: 第1種・第2種の誤り率 (既定 0.05)
+    CFG.arena_max_game: 判定がつかない場合の最大対局数 (既定 400)
+    CFG.arena_min_game: 判定を始める対局数 (既定 20、少数局での正規近似の誤判定を防ぐ)
+
+    Usage:
+    arena = Arena(CFG, env, new_model, best_model)
+    result = arena()
+    if result['decision'] == 'accept':
+        best_model.load_state_dict(new_model.state_dict())
+    """
+    def __init__(self, CFG, env, model1, model2, num_game=None):
+        self.CFG = CFG
+        self.env = env
+        self.models = [model1, model2]
+        self.util = Util(CFG)
+
+        """ 同時に進める対局数 """
+        if num_game is None:
+            num_game = getattr(CFG, 'num_parallel_game', 8)
+        self.num_game = num_game
+
+        self.max_game = getattr(CFG, 'arena_max_game', 400)
+        self.min_game = getattr(CFG, 'arena_min_game', 20)
+        self.elo0 = getattr(CFG, 'arena_elo0', 0)
+        self.elo1 = getattr(CFG, 'arena_elo1', 50)
+        alpha = getattr(CFG, 'arena_alpha', 0.05)
+        beta = getattr(CFG, 'arena_beta', 0.05)
+
+        """ LLRの判定境界 """
+        self.lower = math.log(beta / (1 - alpha))
+        self.upper = math.log((1 - beta) / alpha)
+
+        """ モデルごとの推論用MCTS (推論結果のキャッシュはモデルごとに全局で共有) """
+        self.evaluators = [MCTS(env, model, CFG, train=False) for model in self.models]
+
+        self.seed = getattr(CFG, 'seed', None)
+
+    def __call__(self, max_game=None):
+        """ SPRT で決着するか max_game 局に達するまで対局し、結果を返す """
+        if max_game is None:
+            max_game = self.max_game
+
+        self.wins, self.draws, self.losses = 0, 0, 0
+        self.decision = None
+        self.start_time = time.perf_counter()
+
+        for model in self.models:
+            model.eval()
+
+        num_started = 0
+        games = []
+
+        while self.decision is None:
+            """ 空いた枠に新しい対局を追加 """
+            while len(games) < self.num_game and num_started < max_game:
+                games.append(self.new_game(num_started))
+                num_started += 1
+
+            if len(games) == 0:
+                break
+
+            """ 手番側のモデルごとにリーフを収集 """
+            leaves = [[], []]
+            for game in games:
+                mcts = game['mcts'][game['turn']]
+                k = min(mcts.search_batch_size, self.CFG.num_simulation - game['num_simulation'])
+                game['leaves'], num_search = mcts.collect_leaves(game['node'][game['turn']], k)
+                game['num_simulation'] += num_search
+                leaves[game['model'][game['turn']]] += game['leaves']
+
+            """ モデルごとにまとめて推論 """
+            results = []
+            for evaluator, model_leaves in zip(self.evaluators, leaves):
+                p, v = [], []
+                if len(model_leaves) > 0:
+                    with torch.no_grad():
+                        features = torch.cat([features for _, features, _, _ in model_leaves])
+                        p, v = evaluator.evaluate(features)
+                results.append([p, v, 0])
+
+            for game in games:
+                result = results[game['model'][game['turn']]]
+                i = result[2]
+                j = i + len(game['leaves'])
+                game['mcts'][game['turn']].backup_leaves(game['leaves'], result[0][i:j], result[1][i:j])
+                result[2] = j
+
+            """ シミュレーションが終わった局は1手進める """
+            for game in games:
+                if game['num_simulation'] >= self.CFG.num_simulation:
+                    self.play_move(game)
+
+            finished = [game for game in games if game['done']]
+            games = [game for game in games if not game['done']]
+
+            """ 進捗の表示は終局したときだけ """
+            for game in finished:
+                self.finish_game(game)
+                print('\r{} games  +{} ={} -{}  llr {:.2f} [{:.2f}, {:.2f}]'
+                      .format(self.wins + self.draws + self.losses, self.wins, self.draws, self.losses,
+                              self.llr, self.lower, self.upper), end='')
+                if self.decision is not None:
+                    break
+        print()
+
+        return self.result()
+
+    def new_game(self, game_id):
+        """ 偶数局は model1 が先手、奇数局は model2 が先手 """
+        env = copy.deepcopy(self.env)
+        state = env.reset()
+        order = [0, 1] if game_id % 2 == 0 else [1, 0]
+
+        mcts = []
+        for model_id in order:
+            m = MCTS(env, self.models[model_id], self.CFG, train=False)
+            m.cache = self.evaluators[model_id].cache
+
+            """ 同じ先後の対局が同一にならないよう、ルートのノイズの乱数を局ごとに変える """
+            if self.seed is not None:
+                m.rng = np.random.default_rng([self.seed, game_id, model_id])
+            mcts.append(m)
+
+        game = {
+            'env': env,
+            'model': order, # 手番 (0: 先手, 1: 後手) -> モデル番号
+            'mcts': mcts,
+            'node': [Node(self.CFG, state), Node(self.CFG, state)],
+            'turn': 0,
+            'play_count': 1,
+            'leaves': [],
+            'done': False,
+        }
+        self.start_move(game)
+
+        return game
+
+    def start_move(self, game):
+        turn = game['turn']
+        game['mcts'][turn].start_search(game['node'][turn])
+        game['num_simulation'] = 0
+
+    def play_move(self, game):
+        """ 手番側の探索結果で1手進め、相手側の探索木も同じ手で進める """
+        turn = game['turn']
+        env = game['env']
+
+        next_node = game['mcts'][turn].end_search(game['node'][turn], game['play_count'])
+        action = next_node.action
+
+        game['node'][1 - turn] = self.follow(game['node'][1 - turn], action, env)
+        game['node'][turn] = next_node
+
+        player = env.player
+        _next_state, reward, done = env.step(action)
+
+        if done:
+            game['done'] = True
+            """ 報酬は勝った側のプレーヤー (引き分けは0) """
+            game['winner'] = None if reward == 0 else (turn if reward == player else 1 - turn)
+        else:
+            game['turn'] = 1 - turn
+            game['play_count'] += 1
+            self.start_move(game)
+
+    def follow(self, node, action, env):
+        """ 相手の手で自分の探索木を進める (展開済みなら部分木を再利用) """
+        for child_node in node.child_nodes:
+            if child_node.action == action:
+                node.tree.get_states(child_node.index, env)
+                return child_node
+
+        next_node = Node(self.CFG)
+        next_node.states = self.util.get_next_states(node.states, action, node.player, env)
+        next_node.actions = self.util.get_next_actions(node.actions, action)
+        next_node.action = action
+        next_node.player = -node.player
+        return next_node
+
+    def finish_game(self, game):
+        """ model1 から見た勝敗を数えて SPRT で判定 """
+        if game['winner'] is None:
+            self.draws += 1
+        elif game['model'][game['winner']] == 0:
+            self.wins += 1
+        else:
+            self.losses += 1
+
+        if self.wins + self.draws + self.losses < self.min_game:
+            return
+
+        llr = self.llr
+        if llr >= self.upper:
+            self.decision = 'accept'
+        elif llr <= self.lower:
+            self.decision = 'reject'
+
+    @property
+    def llr(self):
+        return sprt_llr(self.wins, self.draws, self.losses, self.elo0, self.elo1)
+
+    def result(self):
+        """
+        model1 から見た対戦結果
+        elo_ci: Elo差の95%信頼区間, decision: 'accept' (H1), 'reject' (H0), 'inconclusive'
+        """
+        n = self.wins + self.draws + self.losses
+        score = (self.wins + 0.5 * self.draws) / n if n > 0 else 0.5
+
+        if n > 0:
+            var = (self.wins * (1 - score) ** 2 + self.draws * (0.5 - score) ** 2 + self.losses * score ** 2) / n
+            margin = 1.96 * math.sqrt(var / n)
+        else:
+            margin = 0.5
+
+        return {
+            'games': n,
+            'wins': self.wins,
+            'draws': self.draws,
+            'losses': self.losses,
+            'score': score,
+            'elo': elo_from_score(score),
+            'elo_ci': (elo_from_score(score - margin), elo_from_score(score + margin)),
+            'llr': self.llr,
+            'llr_bounds': (self.lower, self.upper),
+            'decision': self.decision or 'inconclusive',
+            'time': time.perf_counter() - self.start_time,
+        }
+
+    def show_result(self, result=None):
+        if result is None:
+            result = self.result()
+
+        print('games {}  +{} ={} -{}  score {:.3f}  elo {:+.1f} [{:+.1f}, {:+.1f}]  llr {:.2f} [{:.2f}, {:.2f}]  {}  ({:.1f}s)'
+              .format(result['games'], result['wins'], result['draws'], result['losses'], result['score'],
+                      result['elo'], *result['elo_ci'], result['llr'], *result['llr_bounds'],
+                      result['decision'], result['time']))
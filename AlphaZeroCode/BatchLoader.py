@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title BatchLoader
+
+""" BatchLoader """
+import queue
+import threading
+import numpy as np
+import torch
+
+
+class BatchLoader():
+    """
+    ミニバッチの組み立て
+    シャッフルした番号で、連続した NumPy 配列から再利用するテンソル (GPUならピン留めメモリ) に直接集める
+    torch.from_numpy で配列とテンソルがメモリを共有するので、要素ごとの変換もコピーもしない
+    背景スレッドで次のバッチを用意しておき (CFG.prefetch_batches 個まで)、学習と重ねる
+
+    データセットは ReplayBuffer / MemmapDataset (gather で直接書き込む) か、
+    従来の [input_features, pi, [z], plain] のリスト (最初に1回だけ連続した配列に変換) を受け取る
+
+    Usage:
+    loader = BatchLoader(CFG, dataset)
+    for epoch in range(num_epoch):
+        for input_features, pi, z in loader:
+            ...
+    """
+    def __init__(self, CFG, dataset, batch_size=None, prefetch=None):
+        self.CFG = CFG
+        self.dataset = dataset
+        self.batch_size = batch_size if batch_size is not None else CFG.batch_size
+        self.prefetch = prefetch if prefetch is not None else getattr(CFG, 'prefetch_batches', 2)
+
+        if hasattr(dataset, 'gather'):
+            self.arrays = None
+            feature_shape = dataset.feature_shape
+        else:
+            """ リストは連続した float32 の配列に1回だけ変換 """
+            self.arrays = (np.asarray([data[0] for data in dataset], dtype=np.float32),
+                           np.asarray([data[1] for data in dataset], dtype=np.float32),
+                           np.asarray([data[2] for data in dataset], dtype=np.float32))
+            feature_shape = self.arrays[0].shape[1:]
+
+        """ 使い回すバッファ: 先読み分 + 学習中の1つ + 作成中の1つ """
+        device = torch.device(CFG.device)
+        pin_memory = device.type == 'cuda' and torch.cuda.is_available()
+        shapes = [(self.batch_size,) + tuple(feature_shape or ()), (self.batch_size, CFG.action_size), (self.batch_size, 1)]
+
+        self.device = device
+        self.buffers = [[torch.empty(shape, dtype=torch.float32, pin_memory=pin_memory) for shape in shapes]
+                        for _ in range(self.prefetch + 2)]
+
+    def __len__(self):
+        return (len(self.dataset) + self.batch_size - 1) // self.batch_size
+
+    def gather(self, indices, buffer):
+        """ 番号のサンプルをバッファに書き込み、先頭 B 件のテンソルを返す """
+        out = [tensor.numpy() for tensor in buffer]
+        B = len(indices)
+
+        if self.arrays is None:
+            self.dataset.gather(indices, out)
+        else:
+            for array, o in zip(self.arrays, out):
+                np.take(array, indices, axis=0, out=o[:B])
+
+        return [tensor[:B] for tensor in buffer]
+
+    def chunks(self):
+        """ 1エポック分の番号 (ディスク上の順に読むため、バッチ内は並べ替える) """
+        indices = np.random.permutation(len(self.dataset))
+
+        for i in range(0, len(indices), self.batch_size):
+            yield np.sort(indices[i:i + self.batch_size])
+
+    def to_device(self, batch):
+        """ GPUへの非同期転送。転送が終わるまでバッファを再利用しないようにイベントを返す """
+        batch = [tensor.to(self.device, non_blocking=True) for tensor in batch]
+
+        event = None
+        if self.device.type == 'cuda':
+            event = torch.cuda.Event()
+            event.record()
+
+        return batch, event
+
+    def __iter__(self):
+        if self.prefetch == 0:
+            for indices in self.chunks():
+                batch, event = self.to_device(self.gather(indices, self.buffers[0]))
+                yield batch
+                if event is not None:
+                    event.synchronize()
+            return
+
+        free = queue.Queue()
+        ready = queue.Queue()
+        stop = threading.Event()
+
+        for buffer in self.buffers:
+            free.put(buffer)
+
+        def produce():
+            try:
+                for indices in self.chunks():
+                    buffer = free.get()
+                    if stop.is_set():
+                        return
+                    ready.put((buffer, self.gather(indices, buffer)))
+                ready.put(None)
+            except Exception as e:
+                ready.put(e)
+
+        thread = threading.Thread(target=produce, daemon=True)
+        thread.start()
+
+        try:
+            while True:
+                item = ready.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+
+                buffer, batch = item
+                batch, event = self.to_device(batch)
+                yield batch
+
+                """ 学習が終わったバッファを返却 """
+                if event is not None:
+                    event.synchronize()
+                free.put(buffer)
+        finally:
+            stop.set()
+            free.put(None) # 待っているスレッドを起こす
+            thread.join()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title DatasetLog
+
+""" DatasetLog """
+import os
+import struct
+import zlib
+import numpy as np
+
+
+""" レコードの枠: 同期用の目印, ペイロードの長さ, ペイロードのCRC32 """
+FRAME = struct.Struct('<4sII')
+MAGIC = b'AZDL'
+
+""" ペイロードの長さの上限 (これを超える長さの枠は壊れているとみなす) """
+MAX_PAYLOAD = 1 << 24
+
+""" ペイロードの先頭: 入力特徴の形 (C, W, W), 行動数, z """
+PAYLOAD = struct.Struct('<HHHHb')
+
+
+class DatasetLog():
+    """
+    外部・対人の棋譜データを受け取る追記専用のログファイル
+    1サンプル = [目印][長さ][CRC32][ペイロード] の1レコードで、1回の write で追記する (O_APPEND)
+    読み込み側は前回の位置から新しく完成したレコードだけを読むので、
+    書きかけのレコードを読むことも、ファイル全体を読み直すこともない
+    途中で切れたレコードやゴミのバイト列は、次の目印まで読み飛ばして num_corrupt に数える
+
+    Usage:
+    # 書き込み側 (対人対局など)
+    DatasetLog(CFG).append(dataset)
+    # 読み込み側 (学習ループ)
+    log = DatasetLog(CFG)
+    for data in log.read():
+        self_play.dataset.append(data)
+    """
+    def __init__(self, CFG, path=None):
+        self.CFG = CFG
+        self.path = path if path is not None else CFG.sub_dataset_log_path
+
+        """ 読み込み位置と統計 """
+        self.offset = 0
+        self.num_record = 0
+        self.num_corrupt = 0
+        self.skipped_bytes = 0
+
+        """ 読み飛ばし中か (続けて壊れている区間は1つとして数える) """
+        self.corrupted = False
+
+    def encode(self, data):
+        """ [input_features, pi, [z], plain] -> ペイロード (plain は含めない) """
+        features = np.asarray(data[0], dtype=np.uint8)
+        pi = np.asarray(data[1], dtype=np.float16)
+        C, H, W = features.shape
+
+        return (PAYLOAD.pack(C, H, W, len(pi), int(data[2][0]))
+                + pi.tobytes()
+                + np.packbits(features.reshape(-1)).tobytes())
+
+    def decode(self, payload):
+        C, H, W, action_size, z = PAYLOAD.unpack_from(payload)
+        offset = PAYLOAD.size
+
+        pi = np.frombuffer(payload, dtype=np.float16, count=action_size, offset=offset)
+        offset += pi.nbytes
+
+        bits = np.frombuffer(payload, dtype=np.uint8, offset=offset)
+        features = np.unpackbits(bits, count=C * H * W).reshape(C, H, W)
+
+        return [features.astype(np.float32), pi.astype(np.float32), [z], None]
+
+    def append(self, dataset):
+        """ サンプルを追記 (1サンプルずつ完結したレコードを書く) """
+        records = []
+        for data in dataset:
+            payload = self.encode(data)
+            records.append(FRAME.pack(MAGIC, len(payload), zlib.crc32(payload)) + payload)
+
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            for record in records:
+                os.write(fd, record)
+        finally:
+            os.close(fd)
+
+    def read(self):
+        """ 前回の続きから、完成しているレコードを全て読む (新しいデータがなければ空のリスト) """
+        if not os.path.exists(self.path):
+            return []
+
+        if os.path.getsize(self.path) < self.offset:
+            """ ファイルが削除・作り直された場合は先頭から読む """
+            self.offset = 0
+
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            buffer = f.read()
+
+        dataset = []
+        position = 0
+
+        while position + FRAME.size <= len(buffer):
+            magic, length, crc = FRAME.unpack_from(buffer, position)
+
+            if magic != MAGIC or length > MAX_PAYLOAD:
+                """ 壊れた枠: 次の目印まで読み飛ばす """
+                position = self.resync(buffer, position)
+                continue
+
+            end = position + FRAME.size + length
+
+            if end > len(buffer):
+                """ 書きかけのレコードは次回に読む (途中で切れたレコードなら、後続が届いた時点でCRCで検出) """
+                break
+
+            payload = buffer[position + FRAME.size:end]
+            if zlib.crc32(payload) != crc:
+                """ 長さも信用できないので、枠の次のバイトから目印を探す """
+                position = self.resync(buffer, position)
+                continue
+
+            dataset.append(self.decode(payload))
+            self.num_record += 1
+            self.corrupted = False
+            position = end
+
+        self.offset += position
+        return dataset
+
+    def resync(self, buffer, position):
+        """ position からの区間を壊れたものとして数え、次の目印の位置を返す """
+        if not self.corrupted:
+            self.num_corrupt += 1
+        self.corrupted = True
+
+        next_position = buffer.find(MAGIC, position + 1)
+        if next_position < 0:
+            """ 目印が見つからなければ、末尾で途切れた目印の可能性がある分だけ残す """
+            next_position = max(len(buffer) - len(MAGIC) + 1, position + 1)
+
+        self.skipped_bytes += next_position - position
+        return next_position
@@ -8,6 +8,7 @@ import copy
 from .Agent import Agent
 from .Util import Util
 from .MCTS import MCTS, Node
+from .Arena import Arena
 
 
 class Evaluate:
@@ -57,8 +58,9 @@ class Evaluate:
                 self.util.show_board(state, self.render_mode)
 
                 if done:
-                    win_model1 += abs(reward)
-                    # win_model1 += reward
+                    """ 報酬は勝った側のプレーヤー (引き分けは0) """
+                    win_model1 += int(reward == self.CFG.first_player)
+                    win_model2 += int(reward == self.CFG.second_player)
                     break
 
                 node2 = self.util.get_next_node(node2, action, env)
@@ -78,15 +80,26 @@ class Evaluate:
                 self.util.show_board(state, self.render_mode)
 
                 if done:
-                    win_model2 += abs(reward)
-                    # win_model2 += reward
+                    win_model1 += int(reward == self.CFG.first_player)
+                    win_model2 += int(reward == self.CFG.second_player)
                     break
 
                 node1 = self.util.get_next_node(node1, action, env)
 
             print("count model1 model2", action_count, win_model1, win_model2)
+        self.show_search_stats(player1, player2)
         print()
 
+    def arena(self, model1, model2, max_game=None):
+        """ 先後を入れ替えながら並行して対局し、SPRTで決着したら打ち切る (Arena を参照) """
+        print('Arena: model1 vs model2')
+
+        arena = Arena(self.CFG, self.env, model1, model2)
+        result = arena(max_game)
+        arena.show_result(result)
+
+        return result
+
     def play_human_vs_AZ(self):
 
         print('Human vs AlphaZero')
@@ -138,6 +151,7 @@ class Evaluate:
                 break
 
         print("AlphaZero, Human", win_alpha_zero, win_human)
+        self.show_search_stats(player)
 
     def play_AZ_vs_human(self):
 
@@ -189,6 +203,7 @@ class Evaluate:
             node = self.util.get_next_node(node, action, env)
 
         print("AlphaZero, Human", win_alpha_zero, win_human)
+        self.show_search_stats(player)
 
     def play_random_vs_AZ(self, play_count=1, show_board=None):
         env = self.env
@@ -236,6 +251,7 @@ class Evaluate:
                     break
 
             print("Random , AlphaZero ", win_random, win_alpha_zero)
+        self.show_search_stats(player)
         print()
 
     def play_AZ_vs_random(self, play_count=1, show_board=None):
@@ -286,4 +302,118 @@ class Evaluate:
                 node = self.util.get_next_node(node, action, env)
 
             print("AlphaZero , Random ", win_alpha_zero, win_random)
+        self.show_search_stats(player)
+        print()
+
+    def play_perfect_vs_AZ(self, play_count=1):
+        """ 完全解析表の最善手で指すプレーヤー (先手) との対戦。負けなければ最善 """
+        env = self.env
+
+        print('Perfect vs AlphaZero')
+        win_perfect = 0
+        win_alpha_zero = 0
+        draw = 0
+
+        player = Agent(env, self.model, self.CFG, train=False)
+
+        for count in (range(play_count)):
+
+            state = env.reset()
+            node = Node(self.CFG, state)
+            node.player = self.CFG.second_player
+
+            while True:
+                """ Perfect turn """
+                action = player.player_perfect(env)
+                state, reward, done = env.step(action)
+
+                self.util.show_board(state, self.render_mode)
+
+                if done:
+                    win_perfect += int(reward == self.CFG.first_player)
+                    draw += int(reward == 0)
+                    break
+
+                node = self.util.get_next_node(node, action, env)
+
+                """ AlphaZero turn """
+                legal_actions = self.env.get_legal_actions()
+
+                if len(legal_actions) > 0:
+                    node = player.alpha_zero(node)
+                    action = node.action
+                else:
+                    action = self.CFG.pass_
+
+                state, reward, done = env.step(action)
+
+                self.util.show_board(state, self.render_mode)
+
+                if done:
+                    win_alpha_zero += int(reward == self.CFG.second_player)
+                    draw += int(reward == 0)
+                    break
+
+            print("Perfect , Draw , AlphaZero ", win_perfect, draw, win_alpha_zero)
+        self.show_search_stats(player)
         print()
+
+    def play_AZ_vs_perfect(self, play_count=1):
+        """ 完全解析表の最善手で指すプレーヤー (後手) との対戦。負けなければ最善 """
+        print('AlphaZero vs Perfect')
+        win_perfect = 0
+        win_alpha_zero = 0
+        draw = 0
+
+        env = self.env
+
+        player = Agent(env, self.model, self.CFG, train=False)
+
+        for count in (range(play_count)):
+
+            state = env.reset()
+            node = Node(self.CFG, state)
+            node.player = self.CFG.first_player
+
+            while True:
+
+                """ AlphaZero turn """
+                legal_actions = self.env.get_legal_actions()
+
+                if len(legal_actions) > 0:
+                    node = player.alpha_zero(node)
+                    action = node.action
+                else:
+                    action = self.CFG.pass_
+
+                state, reward, done = env.step(action)
+
+                self.util.show_board(state, self.render_mode)
+
+                if done:
+                    win_alpha_zero += int(reward == self.CFG.first_player)
+                    draw += int(reward == 0)
+                    break
+
+                """ Perfect turn """
+                action = player.player_perfect(env)
+                state, reward, done = env.step(action)
+
+                self.util.show_board(state, self.render_mode)
+
+                if done:
+                    win_perfect += int(reward == self.CFG.second_player)
+                    draw += int(reward == 0)
+                    break
+
+                node = self.util.get_next_node(node, action, env)
+
+            print("AlphaZero , Draw , Perfect ", win_alpha_zero, draw, win_perfect)
+        self.show_search_stats(player)
+        print()
+
+    def show_search_stats(self, *players):
+        """ 探索の打ち切り (CFG.search_time_limit など) を設定した場合は、1手あたりのシミュレーション数と打ち切りの回数を表示 """
+        for player in players:
+            if player.mcts.search_control:
+                player.mcts.show_search_stats()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title EvaluationCache
+
+""" EvaluationCache """
+from collections import OrderedDict
+import numpy as np
+from . Zobrist import Zobrist
+from . Symmetry import Symmetry
+
+
+class EvaluationCache():
+    """
+    ネットワークの推論結果 (p, v) のLRUキャッシュ
+    キーは局面履歴 (node.states) と手番のZobristハッシュ
+    メモリの上限 (CFG.evaluation_cache_mb) を超えたら古いものから捨てる
+    モデルの重みが変わったら sync() で全て破棄する
+    CFG.symmetry_cache = True なら、盤面の対称変換で正規化した局面をキーにする
+    (キーは (ハッシュ値, 変換) になり、方策は正規化した向きで保持する)
+    """
+    def __init__(self, CFG, max_mb=None, seed=0):
+        self.CFG = CFG
+
+        if max_mb is None:
+            max_mb = getattr(CFG, 'evaluation_cache_mb', 64)
+
+        """ 1エントリのおおよそのバイト数 (方策 float32 + 辞書・配列のオーバーヘッド) """
+        entry_bytes = CFG.action_size * 4 + 200
+        self.max_size = max(int(max_mb * 1024 * 1024 // entry_bytes), 1)
+
+        self.zobrist = Zobrist(CFG, seed)
+        self.symmetry = Symmetry(CFG) if getattr(CFG, 'symmetry_cache', False) else None
+
+        self.table = OrderedDict()
+        self.version = None
+
+        """ 統計 """
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.table)
+
+    def key(self, states, player):
+        """ 局面履歴と手番のハッシュ値 (正規化する場合は、8通りの変換のうち最小のハッシュ値とその変換) """
+        if self.symmetry is None:
+            return self.zobrist(states, player)
+
+        keys = [self.zobrist(s, player) for s in self.symmetry.transform_states(states)]
+        k = int(np.argmin(keys))
+        return (keys[k], k)
+
+    def get(self, key):
+        if self.symmetry is not None:
+            key, k = key
+
+        entry = self.table.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.table.move_to_end(key)
+
+        if self.symmetry is not None:
+            """ 正規化した向きの方策を、問い合わせた局面の向きに戻す """
+            p, v = entry
+            entry = (p[self.symmetry.policy_perm[self.symmetry.inverse[k]]], v)
+
+        return entry
+
+    def put(self, key, p, v):
+        p = np.asarray(p, dtype=np.float32)
+
+        if self.symmetry is not None:
+            key, k = key
+            p = p[self.symmetry.policy_perm[k]]
+
+        self.table[key] = (p, v)
+        self.table.move_to_end(key)
+
+        while len(self.table) > self.max_size:
+            self.table.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.table.clear()
+
+    def sync(self, model):
+        """ モデルの重み (パラメーターとバッファ) が更新されていたらキャッシュを破棄 """
+        version = weights_version(model)
+
+        if version != self.version:
+            self.clear()
+            self.version = version
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+    def show_stats(self):
+        print('evaluation cache: size {}/{}  hits {}  misses {}  hit rate {:.1%}  evictions {}'
+              .format(len(self.table), self.max_size, self.hits, self.misses, self.hit_rate, self.evictions))
+
+
+def weights_version(model):
+    """
+    重みの版数: in-placeで更新されるたびに増えるテンソルのバージョンの合計
+    (optimizer.step, load_state_dict, 学習時のBatchNormの統計量の更新で変わる)
+    """
+    if not hasattr(model, 'parameters'):
+        return 0
+
+    tensors = list(model.parameters()) + list(model.buffers())
+    return (id(model), sum(tensor._version for tensor in tensors))
@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title InferenceServer
+
+""" InferenceServer """
+import time
+import queue
+import threading
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+
+
+""" レイテンシのヒストグラムの区切り (ミリ秒) """
+LATENCY_BUCKETS = [0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000]
+
+
+def serve(model, device, request_queue, response_queues, max_batch_size, max_wait,
+          stop_event, batch_size_hist, latency_hist, overflow_position):
+    """
+    推論ループ: 最初の要求から max_wait 秒待つか max_batch_size 局面に達したら、まとめて推論
+    request: (client_id, features [k, C, W, W], 送信時刻)
+    1つの要求が複数局面を含むので、バッチは max_batch_size を超えることがある
+    (超えたバッチはヒストグラムの最後の枠に数え、その局面数を overflow_position に足す)
+    """
+    model.eval()
+
+    while not stop_event.is_set():
+        try:
+            requests = [request_queue.get(timeout=0.1)]
+        except queue.Empty:
+            continue
+
+        """ 動的バッチの作成 """
+        batch_size = len(requests[0][1])
+        deadline = time.perf_counter() + max_wait
+
+        while batch_size < max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                request = request_queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            requests.append(request)
+            batch_size += len(request[1])
+
+        features = torch.cat([features for _, features, _ in requests]).to(device)
+
+        with torch.no_grad():
+            p, v = model(features)
+        p, v = p.cpu(), v.cpu()
+
+        """ クライアントごとに結果を返却 """
+        i = 0
+        now = time.perf_counter()
+        for client_id, features, sent_time in requests:
+            j = i + len(features)
+            response_queues[client_id].put((p[i:j].clone(), v[i:j].clone()))
+            i = j
+
+            latency = (now - sent_time) * 1000
+            latency_hist[int(np.searchsorted(LATENCY_BUCKETS, latency))] += 1
+
+        if batch_size > max_batch_size:
+            batch_size_hist[max_batch_size + 1] += 1
+            overflow_position.value += batch_size
+        else:
+            batch_size_hist[batch_size] += 1
+
+
+class InferenceClient():
+    """
+    推論サーバーのクライアント。モデルと同じく model(features) -> (p, v) で呼び出せるので、
+    MCTS, Agent, SelfPlay の model の代わりに渡せる
+    """
+    def __init__(self, client_id, request_queue, response_queue):
+        self.client_id = client_id
+        self.request_queue = request_queue
+        self.response_queue = response_queue
+
+    def __call__(self, features):
+        self.request_queue.put((self.client_id, features.cpu(), time.perf_counter()))
+        return self.response_queue.get()
+
+    def eval(self):
+        """ モデルの状態はサーバー側で管理する """
+        return self
+
+
+class InferenceServer():
+    """
+    モデルを1つだけ保持し、複数のMCTSクライアントからの推論要求を動的にバッチ化する
+    process=False ならスレッド、True ならプロセスでサーバーを動かす (CPUのみのLinuxでも動作)
+
+    Usage:
+    server = InferenceServer(model, CFG, num_client=8)
+    server.start()
+    agent = Agent(env, server.clients[0], CFG)
+    ...
+    server.show_stats()
+    server.close()
+    """
+    def __init__(self, model, CFG, num_client=1, process=False):
+        self.model = model
+        self.CFG = CFG
+        self.process = process
+        self.max_batch_size = getattr(CFG, 'inference_max_batch_size', 64)
+        self.max_wait = getattr(CFG, 'inference_max_wait', 0.002) # 秒
+
+        self.ctx = mp.get_context(getattr(CFG, 'mp_start_method', 'fork'))
+
+        if process:
+            self.request_queue = self.ctx.Queue()
+            response_queues = [self.ctx.Queue() for _ in range(num_client)]
+            self.stop_event = self.ctx.Event()
+        else:
+            self.request_queue = queue.Queue()
+            response_queues = [queue.Queue() for _ in range(num_client)]
+            self.stop_event = threading.Event()
+
+        self.response_queues = response_queues
+        self.clients = [InferenceClient(i, self.request_queue, response_queue)
+                        for i, response_queue in enumerate(response_queues)]
+
+        """
+        バッチサイズとレイテンシのヒストグラム (プロセス間で共有)
+        バッチサイズの最後の枠は max_batch_size を超えたバッチで、その局面数は overflow_position に数える
+        """
+        self.batch_size_hist = self.ctx.Array('l', self.max_batch_size + 2)
+        self.latency_hist = self.ctx.Array('l', len(LATENCY_BUCKETS) + 1)
+        self.overflow_position = self.ctx.Value('l', 0)
+
+        self.server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def start(self):
+        if self.process:
+            self.model.share_memory()
+            Worker = self.ctx.Process
+        else:
+            Worker = threading.Thread
+
+        self.server = Worker(target=serve,
+                             args=(self.model, self.CFG.device, self.request_queue, self.response_queues,
+                                   self.max_batch_size, self.max_wait, self.stop_event,
+                                   self.batch_size_hist, self.latency_hist, self.overflow_position),
+                             daemon=True)
+        self.server.start()
+
+    def close(self):
+        self.stop_event.set()
+        if self.server is not None:
+            self.server.join()
+            self.server = None
+
+    def stats(self):
+        """ ヒストグラム {バッチサイズ: 回数} (上限を超えたバッチは '>上限'), {レイテンシの上限(ms): 回数} """
+        sizes = list(range(self.max_batch_size + 1)) + ['>{}'.format(self.max_batch_size)]
+        batch_size_hist = {size: count for size, count in zip(sizes, self.batch_size_hist) if count > 0}
+
+        labels = ['<={}ms'.format(bucket) for bucket in LATENCY_BUCKETS] + ['>{}ms'.format(LATENCY_BUCKETS[-1])]
+        latency_hist = {label: count for label, count in zip(labels, self.latency_hist) if count > 0}
+
+        return batch_size_hist, latency_hist
+
+    def show_stats(self):
+        batch_size_hist, latency_hist = self.stats()
+        num_batch = sum(batch_size_hist.values())
+        num_overflow = self.batch_size_hist[self.max_batch_size + 1]
+        num_position = sum(size * count for size, count in batch_size_hist.items() if isinstance(size, int))
+        num_position += self.overflow_position.value
+
+        print('batches: {}  positions: {}  mean batch size: {:.1f}  over max batch size: {} batches, {} positions'
+              .format(num_batch, num_position, num_position / max(num_batch, 1),
+                      num_overflow, self.overflow_position.value))
+        print('batch size:', batch_size_hist)
+        print('latency   :', latency_hist)
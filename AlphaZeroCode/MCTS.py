@@ -3,11 +3,15 @@
 # @title MCTS
 """ Import libraries Original """
 import copy
+import time
 from math import sqrt
 import numpy as np
 import torch
 from . Util import Util
 from . Node import Node
+from . EvaluationCache import EvaluationCache, weights_version
+from . TranspositionTable import TranspositionTable
+from . Symmetry import Symmetry
 
 class MCTS():
     """
@@ -21,114 +25,488 @@ class MCTS():
         self.CFG = CFG
         self.util = Util(CFG)
 
+        """ バッチ探索: 1回の推論でまとめて評価するリーフ数 (1なら逐次探索) """
+        self.search_batch_size = getattr(CFG, 'search_batch_size', 1)
+        self.virtual_loss = getattr(CFG, 'virtual_loss', 1)
+
+        """ ディリクレノイズと行動のサンプリング用の乱数 (CFG.seedで再現可能) """
+        self.rng = np.random.default_rng(getattr(CFG, 'seed', None))
+
+        """ push/popに対応した環境は、1つの環境を進めて戻すだけで探索する """
+        self.undoable = hasattr(self.env, 'push') and hasattr(self.env, 'pop')
+
+        """ 推論結果のキャッシュ (CFG.evaluation_cache_mb を設定した場合) """
+        self.cache = EvaluationCache(CFG) if hasattr(CFG, 'evaluation_cache_mb') else None
+
+        """ トランスポジションテーブル (CFG.transposition_table_mb を設定した場合、探索木はDAGになる) """
+        self.transposition = TranspositionTable(CFG) if hasattr(CFG, 'transposition_table_mb') else None
+
+        """ 推論時に局面ごとのランダムな対称変換をかける (CFG.symmetry_inference = True の場合) """
+        self.symmetry = Symmetry(CFG) if getattr(CFG, 'symmetry_inference', False) else None
+
+        """ 推論専用モデル (CFG.fused_inference = True の場合、BatchNorm を畳み込んだモデルで推論) """
+        self.fused_inference = getattr(CFG, 'fused_inference', False) and hasattr(model, 'fuse')
+        self.fused_model = None
+        self.fused_version = None
+
+        """
+        探索の打ち切り (評価・対人戦で1手の応答時間を抑える)
+        CFG.search_time_limit: 1手の探索時間の上限 (秒)
+        CFG.search_early_stop = True: 残りのシミュレーションを全て2番手に回しても最善手の訪問回数に届かなければ打ち切る
+        CFG.search_forced_move = True: 合法手が1つだけなら、その手を1回訪問した時点で打ち切る
+        """
+        self.time_limit = getattr(CFG, 'search_time_limit', None)
+        self.early_stop = getattr(CFG, 'search_early_stop', False)
+        self.forced_move = getattr(CFG, 'search_forced_move', False)
+        self.search_control = self.time_limit is not None or self.early_stop or self.forced_move
+
+        """ 直前の探索で実行したシミュレーション数と打ち切りの理由、累計 """
+        self.num_search = 0
+        self.stop_reason = None
+        self.search_stats = {'moves': 0, 'simulations': 0, 'forced': 0, 'early_stop': 0, 'time_limit': 0}
+
     def __call__(self, node, play_count=1):
 
+        self.start_search(node)
+        self.deadline = None if self.time_limit is None else time.perf_counter() + self.time_limit
+        self.stop_reason = None
+
+        """ シミュレーション """
+        if self.search_batch_size > 1:
+            num_search = self.search_batch(node, play_count)
+        else:
+            num_search = 0
+            for i in range(self.CFG.num_simulation): # AlphaGo Zero 1600 sim / AlphaZero 800 sim
+                if self.search_control and self.stop_search(num_search, play_count):
+                    break
+
+                if not self.undoable:
+                    self.reset_env(node)
+
+                """ ルートノードから再帰的に探索を実行 """
+                self.search(self.root)
+                num_search += 1
+
+        self.log_search(num_search)
+
+        return self.end_search(node, play_count)
+
+    def start_search(self, node):
+        """ 探索の開始: ルートの設定 """
         self.model.eval()
         self.player = node.player # Important!        
-        root_node = copy.deepcopy(node)
-        root_node.is_root = True
 
-        """ シミュレーション """
-        for i in range(self.CFG.num_simulation): # AlphaGo Zero 1600 sim / AlphaZero 800 sim
-            self.env.reset()
-            self.env.state = copy.deepcopy(root_node.states[0])
-            self.env.player = root_node.player  # resetされたので、Self play でのプレーヤーに再設定
+        if self.cache is not None:
+            """ 重みが変わっていたらキャッシュを破棄 """
+            self.cache.sync(self.model)
 
-            """ ルートノードから再帰的に探索を実行 """
-            self.search(root_node)
+        if node.index != node.tree.root:
+            """ 前回の探索木から、現在の局面以下の部分木をルートとして再利用 """
+            node.tree = node.tree.extract_subtree(node.index)
+            node.index = node.tree.root
 
-        node.input_features = root_node.input_features # Copy from simulated node. Necessary for dataset.
+        """ 探索木の配列とルートのノードID """
+        self.tree = node.tree
+        self.root = node.index
 
-        if len(root_node.child_nodes) > 0:
-            next_node = self.play(root_node, play_count)
+        if self.transposition is not None and self.transposition.tree is not self.tree:
+            """ 探索木が変わったら、展開済みノードを登録し直す """
+            self.transposition.rebuild(self.tree)
+
+        """ 再利用した訪問回数 """
+        self.reused_simulation = int(self.tree.n[self.root])
+
+        """ ルートの事前確率にノイズを加えるのは探索ごとに1回 """
+        self.tree.p_noise.pop(self.root, None)
+        if self.tree.child_count[self.root] > 0:
+            self.add_dirichlet_noise(self.root)
+
+        self.reset_env(node)
+
+    def end_search(self, root_node, play_count=1):
+        """ 探索の終了: 訪問回数から次の手を決定 """
+        self.util.state2feature(root_node) # Necessary for dataset.
+
+        if self.tree.child_count[self.root] > 0:
+            index = self.play(self.root, play_count)
+
+            """ 返却ノードの局面履歴を確定 """
+            self.reset_env(root_node)
+            self.tree.get_states(index, self.env)
+            next_node = Node(self.CFG, tree=self.tree, index=index)
         else:
             """ 打つ手がない場合、返却ノードにパスを設定 """
-            next_node = root_node
+            next_node = Node(self.CFG)
+            next_node.states = root_node.states
+            next_node.actions = root_node.actions
             next_node.player = -root_node.player
             next_node.action = self.CFG.pass_
 
-        """ 訪問回数で算出した方策を現在のノードに格納 """
-        node.child_nodes = root_node.child_nodes
-
         return next_node
 
-    def search(self, node, done=False, reward=0):
+    def reset_env(self, root_node):
+        self.env.reset()
+        self.env.state = copy.deepcopy(root_node.states[0])
+        self.env.player = root_node.player  # resetされたので、Self play でのプレーヤーに再設定
+
+    def step(self, index):
+        """ 探索中の1手。push/popに対応した環境では取り消し可能に実行 """
+        action = int(self.tree.action[index])
+
+        if self.undoable:
+            return self.env.push(action)
+
+        return self.env.step(action)
+
+    def undo(self):
+        """ 探索中の1手を取り消す (push/popに対応していない環境では毎回ルートから再設定) """
+        if self.undoable:
+            self.env.pop()
+
+    def search(self, index, done=False, reward=0):
 
         """ ゲームオーバー """
         if done:
             v = reward
-            self.backup(node, v)
+            self.backup(index, v)
             return v
 
         """ リーフ """
-        if len(node.child_nodes) == 0:
-            v = self.expand(node)
-            self.backup(node, v)
+        if self.tree.child_count[index] == 0:
+            v = self.expand(index)
+            self.backup(index, v)
             return v
 
         """ 選択 """
-        next_node = self.select(node)
-        _, reward, done = self.env.step(next_node.action)
+        next_index = self.select(index)
+        _, reward, done = self.step(next_index)
 
         """ 探索（相手の手番で） """
-        v = -self.search(next_node, done, reward)
+        v = -self.search(next_index, done, reward)
+        self.undo()
 
         """ バックアップ """ 
-        self.backup(node, v) 
+        self.backup(index, v) 
 
         return v
 
-    def select(self, node):
+    def search_batch(self, root_node, play_count=1):
+        """ バッチ探索
+        バーチャルロスを使ってK個のリーフを集め、ネットワークで一括推論してからバックアップ
+        """
+        num_simulation = 0
+
+        while num_simulation < self.CFG.num_simulation:
+            if self.search_control and self.stop_search(num_simulation, play_count):
+                break
+
+            k = min(self.search_batch_size, self.CFG.num_simulation - num_simulation)
+            leaves, num_search = self.collect_leaves(root_node, k)
+            self.expand_leaves(leaves)
+            num_simulation += num_search
+
+        return num_simulation
+
+    def stop_search(self, num_search, play_count=1):
+        """ 探索を打ち切るか判定し、理由を stop_reason に設定 (ルートの子ノードが1回も訪問されるまでは続ける) """
+        tree = self.tree
+        offset = tree.child_offset[self.root]
+        count = tree.child_count[self.root]
+        N = tree.n[offset:offset + count]
+
+        if count == 0 or N.sum() == 0:
+            return False
+
+        if self.forced_move and count == 1:
+            self.stop_reason = 'forced'
+
+        elif self.early_stop and count > 1 and self.deterministic(play_count):
+            """ 2番手が残りのシミュレーションを全て得ても最善手を超えられない """
+            n2, n1 = np.partition(N, -2)[-2:]
+            if n1 - n2 > self.CFG.num_simulation - num_search:
+                self.stop_reason = 'early_stop'
+
+        if self.stop_reason is None and self.deadline is not None and time.perf_counter() > self.deadline:
+            self.stop_reason = 'time_limit'
+
+        return self.stop_reason is not None
+
+    def deterministic(self, play_count):
+        """ 訪問回数最大の手を選ぶ手番か (温度でサンプリングする手番は訪問回数の比率が変わるので打ち切らない) """
+        return not self.train or play_count > self.CFG.tau_limit
+
+    def log_search(self, num_search):
+        """ 実行したシミュレーション数を記録 """
+        self.num_search = num_search
+        self.search_stats['moves'] += 1
+        self.search_stats['simulations'] += num_search
+        if self.stop_reason is not None:
+            self.search_stats[self.stop_reason] += 1
+
+    def show_search_stats(self):
+        stats = self.search_stats
+        print('search: moves {}  simulations/move {:.1f} (max {})  forced {}  early stop {}  time limit {}'
+              .format(stats['moves'], stats['simulations'] / max(stats['moves'], 1), self.CFG.num_simulation,
+                      stats['forced'], stats['early_stop'], stats['time_limit']))
+
+    def collect_leaves(self, root_node, k):
+        """ 最大k個の未評価リーフを収集 """
+        leaves = []
+        pending = set()
+        num_search = 0
+
+        for _ in range(k):
+            if not self.undoable:
+                self.reset_env(root_node)
+
+            path, done, reward = self.descend(self.root)
+            leaf = path[-1]
+
+            if done:
+                """ ゲームオーバーはその場でバックアップ """
+                self.backup_path(path, reward)
+                num_search += 1
+
+            elif leaf in pending:
+                """ 同じリーフを再選択した場合は、このラウンドの収集を打ち切る """
+                self.rewind(path)
+                break
+
+            else:
+                key = self.position_key(leaf)
+                v = self.transpose(leaf, key)
+                cached = self.cached_evaluation(leaf, key) if v is None else None
+
+                if v is not None:
+                    """ 展開済みの同じ局面と子ノードを共有し、その価値をバックアップ """
+                    self.backup_path(path, v)
+
+                elif cached is not None:
+                    """ キャッシュにある局面は推論せずにその場で展開 """
+                    p, v = cached
+                    self.add_child_nodes(leaf, p, key=key)
+                    self.backup_path(path, v)
+                else:
+                    """ 推論に必要な入力特徴と合法手を、リーフの局面で取得 """
+                    self.add_virtual_loss(path)
+                    pending.add(leaf)
+                    leaves.append((path, self.leaf_feature(leaf), self.env.get_legal_actions(), key))
+
+                num_search += 1
+
+            self.rewind(path)
+
+        return leaves, num_search
+
+    def rewind(self, path):
+        """ リーフからルートの局面まで環境を戻す """
+        for _ in range(len(path) - 1):
+            self.undo()
+
+    def descend(self, index):
+        """ 選択を繰り返してリーフまで降りる """
+        path = [index]
+        done, reward = False, 0
+
+        while self.tree.child_count[index] > 0:
+            index = self.select(index)
+            _, reward, done = self.step(index)
+            path.append(index)
+            if done:
+                break
+
+        return path, done, reward
+
+    def expand_leaves(self, leaves):
+        """ 展開と評価 (バッチ) """
+        if len(leaves) == 0:
+            return
+
+        """ 入力特徴を [K, C, W, W] にまとめる """
+        features = torch.cat([features for _, features, _, _ in leaves])
+
+        """ 推論 """
+        p, v = self.evaluate(features)
+
+        self.backup_leaves(leaves, p, v)
+
+    def backup_leaves(self, leaves, p, v):
+        """ 推論結果 (リーフごとの p, v) で展開してバックアップ """
+        for i, (path, _, legal_actions, key) in enumerate(leaves):
+            if self.cache is not None and key is not None:
+                self.cache.put(self.cache_key(path[-1], key), p[i], v[i])
+
+            self.add_child_nodes(path[-1], p[i], legal_actions, key)
+            self.remove_virtual_loss(path)
+            self.backup_path(path, v[i])
+
+    def add_virtual_loss(self, path):
+        """ 選択中の経路を一時的に負けとみなし、他の探索を別の経路へ誘導 """
+        tree = self.tree
+        tree.n[path] += self.virtual_loss
+        tree.w[path] -= self.virtual_loss
+        tree.Q[path] = tree.w[path] / np.maximum(tree.n[path], 1)
+
+    def remove_virtual_loss(self, path):
+        tree = self.tree
+        tree.n[path] -= self.virtual_loss
+        tree.w[path] += self.virtual_loss
+        tree.Q[path] = np.where(tree.n[path] > 0, tree.w[path] / np.maximum(tree.n[path], 1), 0)
+
+    def backup_path(self, path, v):
+        """ リーフからルートへ、手番ごとに符号を反転しながらバックアップ """
+        for index in reversed(path):
+            self.backup(index, v)
+            v = -v
+
+    def select(self, index):
         """ 選択
         Ｑ（相手にとっては－Ｑ）＋Ｕの最大値から、最良の行動を選ぶ
+        子ノードの配列に対して一括で計算する
         """
-        pucts = [] # PUCTの値
+        tree = self.tree
         cpuct = self.CFG.cpuct # 1-6
-        s = node.n - 1 # Σ_b (N(s,b)) と同じこと
-        child_nodes = self.util.get_child_nodes(node) # エッジの取得
-
-        if node.is_root:
-            """ 事前確率にディリクレノイズを追加 """
-            child_nodes = self.add_dirichlet_noise(child_nodes)
-
-        for child_node in child_nodes:
-            p = child_node.p
-            n = child_node.n
-            Q = child_node.Q
-            U = cpuct * p * sqrt(s) / (1 + n)
-            pucts.append(Q + U)
-  
-        max_index = np.argmax(pucts)
-        next_node = node.child_nodes[max_index]
+        offset = tree.child_offset[index]
+        end = offset + tree.child_count[index]
+        P = tree.p[offset:end]
 
-        return next_node
+        if self.transposition is None:
+            s = tree.n[index] - 1 # Σ_b (N(s,b)) と同じこと
+        else:
+            """ 子ノードを共有すると、親の訪問回数と子の訪問回数の合計は一致しない """
+            s = int(tree.n[offset:end].sum())
+
+        if index == self.root:
+            """ ディリクレノイズを加えた事前確率 """
+            P = tree.p_noise.get(index, P)
+
+        U = cpuct * P * sqrt(s) / (1 + tree.n[offset:end])
+        pucts = tree.Q[offset:end] + U # PUCTの値
+
+        return offset + int(np.argmax(pucts))
 
 
     """ 展開と評価 """
-    def expand(self, node):
+    def expand(self, index):
 
-        """ 入力特徴の作成 """
-        features = self.util.state2feature(node)
+        key = self.position_key(index)
 
-        """ 推論 """
-        p, v = self.model(features)
+        """ 展開済みの同じ局面があれば、子ノードを共有してその価値を返す """
+        v = self.transpose(index, key)
+        if v is not None:
+            return v
+
+        cached = self.cached_evaluation(index, key)
+
+        if cached is not None:
+            p, v = cached
+        else:
+            """ 入力特徴の作成 """
+            features = self.leaf_feature(index)
+
+            """ 推論 """
+            p, v = self.evaluate(features)
+
+            """ バッチの次元を削除 """
+            p = p[0]
+            v = v[0] # スカラー
 
-        """ バッチの次元を削除 """
-        p = p[0].tolist()
-        v = v[0].tolist()[0] # スカラーに変換
+            if self.cache is not None and key is not None:
+                self.cache.put(self.cache_key(index, key), p, v)
 
         """ 子ノードの生成 """
-        self.add_child_nodes(node, p)
+        self.add_child_nodes(index, p, key=key)
 
         return v 
 
-    def backup(self, node, v):
+    def evaluate(self, features):
+        """
+        推論 [K, C, W, W] -> 方策 [K][action_size], 価値 [K]
+        対称変換を使う場合は、変換した局面で推論してから方策を元の向きに戻す
+        """
+        model = self.inference_model()
+
+        if self.symmetry is None:
+            p, v = model(features)
+            return p.tolist(), v[:, 0].tolist()
+
+        k = self.symmetry.random_transforms(len(features), self.rng)
+        p, v = model(self.symmetry.transform_features(features, k))
+        p = self.symmetry.transform_policy(p, self.symmetry.inverse[k])
+        return p.tolist(), v[:, 0].tolist()
+
+    def inference_model(self):
+        """ 推論に使うモデル。推論専用モデルは、学習で重みが変わっていたら作り直す """
+        if not self.fused_inference:
+            return self.model
+
+        version = weights_version(self.model)
+        if version != self.fused_version:
+            self.fused_model = self.model.fuse()
+            self.fused_version = version
+
+        return self.fused_model
+
+    def leaf_states(self, index):
+        """ リーフの局面履歴を保持 (環境はリーフの局面) """
+        if index not in self.tree.states:
+            self.tree.set_states(index, self.env.state)
+
+        return self.tree.states[index]
+
+    def leaf_feature(self, index):
+        """ リーフの入力特徴を作成 """
+        self.leaf_states(index)
+        return self.util.state2feature(Node(self.CFG, tree=self.tree, index=index))
+
+    def position_key(self, index):
+        """ 局面のハッシュ値 (キャッシュもトランスポジションテーブルも使わない場合はNone) """
+        if self.transposition is not None:
+            return self.transposition.key(self.leaf_states(index), self.tree.player[index])
+
+        if self.cache is not None:
+            return self.cache.key(self.leaf_states(index), self.tree.player[index])
+
+        return None
+
+    def cache_key(self, index, key):
+        """ キャッシュのキー (対称変換で正規化する場合は、トランスポジションテーブルのキーとは別に作る) """
+        if self.transposition is None or self.cache.symmetry is None:
+            return key
+
+        return self.cache.key(self.leaf_states(index), self.tree.player[index])
+
+    def cached_evaluation(self, index, key):
+        """ キャッシュにある推論結果 (p, v) """
+        if self.cache is None or key is None:
+            return None
+
+        return self.cache.get(self.cache_key(index, key))
+
+    def transpose(self, index, key):
+        """ 同じ局面が展開済みなら子ノードの配列を共有し、その平均行動価値を返す (なければNone) """
+        if self.transposition is None or key is None:
+            return None
+
+        other = self.transposition.get(key)
+        if other is None:
+            return None
+
+        self.tree.link(index, other)
+
+        if index == self.root:
+            self.add_dirichlet_noise(index)
+
+        return float(self.tree.Q[other])
+
+    def backup(self, index, v):
         """ バックアップ """
-        node.n += 1
-        node.w += v
-        node.Q = node.w / node.n
+        tree = self.tree
+        tree.n[index] += 1
+        tree.w[index] += v
+        tree.Q[index] = tree.w[index] / tree.n[index]
 
-    def play(self, node, play_count):
+    def play(self, index, play_count):
         """ 実行
 
         探索が完了すると、 N^(1/τ)に比例した探索確率πで行動を決定
@@ -149,9 +527,8 @@ class MCTS():
             """ 評価時には決定的に """
             tau = 0
                     
-        N = []
-        for child_node in node.child_nodes:
-            N.append(child_node.n)
+        child_ids = self.tree.child_ids(index)
+        N = self.tree.n[child_ids.start:child_ids.stop]
 
         """ 探索(Exploration)か 経験の利用(Exploitation)か """
         if tau > 0:
@@ -166,69 +543,63 @@ class MCTS():
             pi = M / M_sum
 
             """ 方策からサンプリング """
-            p = np.random.choice(pi, p=pi)
-            index = np.argwhere(pi==p)[0][0].tolist()
+            p = self.rng.choice(pi, p=pi)
+            i = np.argwhere(pi==p)[0][0].tolist()
 
         else:
             """ 決定的に選択 """
-            index = np.argmax(N)
+            i = np.argmax(N)
 
         """ 次のノードへ遷移 """
-        next_node = node.child_nodes[index]
+        next_index = child_ids[i]
 
         # パスの処理
-        if hasattr(self.CFG, 'pass_'):
-            if next_node.action == self.CFG.pass_:
-                next_node.player = -node.player
+        if self.tree.is_pass(next_index):
+            self.tree.player[next_index] = -self.tree.player[index]
 
-        return next_node
+        return next_index
 
-    def add_dirichlet_noise(self, child_nodes):
+    def add_dirichlet_noise(self, index):
         """
         ルートノードの事前確率にディリクレノイズを加えて、さらなる探索
         P(s, a) = (1 - ε) * p(a) + ε*η(a)
         where η～ Dir(0.03), ε= 0.25
+
+        ノイズはルートの展開時に1回だけサンプリングし、
+        元の事前確率 (tree.p) とは別に tree.p_noise に保持する
         """
         e = self.CFG.Dirichlet_epsilon
         alpha = self.CFG.Dirichlet_alpha
 
-        dirichlet_noise = np.random.dirichlet([alpha] * len(child_nodes))
+        tree = self.tree
+        offset = tree.child_offset[index]
+        count = tree.child_count[index]
+        P = tree.p[offset:offset + count]
 
-        for i, child_node in enumerate(child_nodes):
-            x = child_node.p
-            p = (1-e) * x + e * dirichlet_noise[i]
-            child_nodes[i].p = p
+        dirichlet_noise = self.rng.dirichlet([alpha] * count)
 
-        return child_nodes
+        tree.p_noise[index] = ((1-e) * P + e * dirichlet_noise).astype(np.float32)
 
     """ 子ノードの生成 """
-    def add_child_nodes(self, node, p):
-        """ 合法手の取得 """
-        legal_actions = self.env.get_legal_actions()
-
-        for action in legal_actions:
-            states = self.util.get_next_states(node.states, action, node.player, self.env)
-            actions = self.util.get_next_actions(node.actions, action)
-
-            child_node = Node(self.CFG)
-            child_node.p = p[action]
-            child_node.action = action
-            child_node.actions = actions
-            child_node.states = states
-            child_node.player = -node.player
-            node.child_nodes.append(child_node)
+    def add_child_nodes(self, index, p, legal_actions=None, key=None):
+        """ 合法手の取得 (バッチ探索ではリーフで取得済みの合法手を受け取る) """
+        if legal_actions is None:
+            legal_actions = self.env.get_legal_actions()
+
+        actions = list(legal_actions)
 
         if hasattr(self.CFG, 'pass_'):
             # Passのノードを追加
-            action = self.CFG.pass_
-            states = copy.deepcopy(node.states)
-            actions = self.util.get_next_actions(node.actions, action)
-            child_node = Node(self.CFG)
-
-            child_node.p = p[action]
-            child_node.action = action
-            child_node.actions = actions
-            child_node.states = states
-            child_node.player = -node.player
-            node.child_nodes.append(child_node)
-                
+            actions.append(self.CFG.pass_)
+
+        actions = np.array(actions, dtype=np.int32)
+        p = np.asarray(p, dtype=np.float32)[actions]
+
+        self.tree.add_child_nodes(index, actions, p, -self.tree.player[index])
+
+        if self.transposition is not None and key is not None:
+            """ 展開したノードを登録 """
+            self.transposition.put(key, index)
+
+        if index == self.root:
+            self.add_dirichlet_noise(index)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title MemmapDataset
+
+""" MemmapDataset """
+import os
+import json
+import numpy as np
+from . ReplayBuffer import ReplayBuffer
+
+
+class MemmapDataset(ReplayBuffer):
+    """
+    メモリマップしたファイル上の経験データ (ReplayBuffer と同じ形式、同じ操作)
+    ディレクトリに planes.npy, pi.npy, z.npy (容量分を確保) と meta.json (件数と書き込み位置) を置く
+    RAMに読み込まないので、RAMより大きなリプレイウィンドウでも開いてすぐに学習できる
+
+    Usage:
+    dataset = MemmapDataset(CFG, '/content/dataset')  # 既存のファイルがあれば開く
+    dataset.append(data) ...
+    dataset.flush()                                   # meta.json を更新
+    features, pi, z = dataset.sample(256)             # ランダムなミニバッチ
+    """
+    def __init__(self, CFG, path=None, capacity=None, mode='r+'):
+        self.path = path if path is not None else CFG.memmap_dataset_path
+        self.mode = mode # 'r' なら読み込み専用
+
+        exists = os.path.exists(self.filepath('meta.json'))
+        if capacity is None and exists:
+            capacity = 0 # 既存のファイルの容量は meta.json から読む
+
+        super().__init__(CFG, capacity, keep_plain=False)
+
+        if exists:
+            self.open()
+
+    def filepath(self, name):
+        return os.path.join(self.path, name)
+
+    def allocate(self, feature_shape):
+        """ 容量分のファイルを作成 """
+        os.makedirs(self.path, exist_ok=True)
+
+        self.feature_shape = tuple(int(x) for x in feature_shape)
+        num_bytes = (int(np.prod(self.feature_shape)) + 7) // 8
+
+        open_memmap = np.lib.format.open_memmap
+        self.planes = open_memmap(self.filepath('planes.npy'), mode='w+', dtype=np.uint8,
+                                  shape=(self.capacity, num_bytes))
+        self.pi = open_memmap(self.filepath('pi.npy'), mode='w+', dtype=np.float16,
+                              shape=(self.capacity, self.CFG.action_size))
+        self.z = open_memmap(self.filepath('z.npy'), mode='w+', dtype=np.int8, shape=(self.capacity,))
+
+        self.flush()
+
+    def open(self):
+        """ 既存のファイルをメモリマップで開く """
+        self.refresh()
+
+        self.planes = np.load(self.filepath('planes.npy'), mmap_mode=self.mode)
+        self.pi = np.load(self.filepath('pi.npy'), mmap_mode=self.mode)
+        self.z = np.load(self.filepath('z.npy'), mmap_mode=self.mode)
+
+    def refresh(self):
+        """ meta.json を読み直す (別プロセスが追加したデータを見る) """
+        with open(self.filepath('meta.json')) as f:
+            meta = json.load(f)
+
+        self.capacity = meta['capacity']
+        self.feature_shape = tuple(meta['feature_shape'])
+        self.head = meta['head']
+        self.size = meta['size']
+
+    def flush(self):
+        """ 配列をディスクに書き出してから meta.json を更新 """
+        if self.planes is None:
+            return
+
+        for array in (self.planes, self.pi, self.z):
+            if hasattr(array, 'flush'):
+                array.flush()
+
+        meta = {
+            'capacity': self.capacity,
+            'feature_shape': list(self.feature_shape),
+            'head': self.head,
+            'size': self.size,
+        }
+
+        """ 読み込み側が書きかけのファイルを見ないように、置き換えで更新 """
+        tmp_path = self.filepath('meta.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.filepath('meta.json'))
+
+    def extend(self, dataset):
+        super().extend(dataset)
+        self.flush()
+        return self
+
+    def clear(self):
+        super().clear()
+        self.flush()
+
+    def load(self, filepath):
+        """ ReplayBuffer.save() した npz を取り込む """
+        super().load(filepath)
+        self.flush()
+        return self
@@ -4,35 +4,92 @@
 
 """ Import libraries Original """
 import copy
+from . Tree import Tree
 
 class Node():
     """
     Node: Represents a game state
+    探索木(Tree)の配列をノードIDで参照するビュー
     """
-    def __init__(self, CFG, state=None):
-        self.states = None
-        self.is_root = False
-        self.child_nodes = []
-        self.action = None
-        self.actions = [0] * CFG.history_size # for one-hot
-        self.player = CFG.first_player
+    def __init__(self, CFG, state=None, tree=None, index=None):
+        self.CFG = CFG
         self.input_features = None
         self.test = "default"
-        self.CFG = CFG
+
+        if tree is None:
+            tree = Tree(CFG)
+            index = tree.add_node(CFG.first_player)
+            tree.actions[index] = [0] * CFG.history_size # for one-hot
+
+        self.tree = tree
+        self.index = index
 
         if state:
             self.set_default_states(state)
 
-        """ Edge """
-        self.n = 0 # 訪問回数 (visit count)
-        self.w = 0 # 累計行動価値 (total action-value)
-        self.p = 0 # 事前確率 (prior probability)
-        self.Q = 0 # 平均行動価値 (action-value)
-
     def set_default_states(self, state):
-        state = copy.deepcopy(state) 
+        state = copy.deepcopy(state)
         w = self.CFG.board_width
         h = self.CFG.history_size #
-        self.states = [[[0 for i in range(w)] for j in range(w)] for _ in range(h)]
-        self.states.insert(0,state)
-        self.states.pop(-1)
+        states = [[[0 for i in range(w)] for j in range(w)] for _ in range(h)]
+        states.insert(0,state)
+        states.pop(-1)
+        self.states = states
+
+    @property
+    def states(self):
+        return self.tree.get_states(self.index)
+
+    @states.setter
+    def states(self, states):
+        self.tree.states[self.index] = states
+
+    @property
+    def actions(self):
+        return self.tree.get_actions(self.index)
+
+    @actions.setter
+    def actions(self, actions):
+        self.tree.actions[self.index] = actions
+
+    @property
+    def child_nodes(self):
+        return [Node(self.CFG, tree=self.tree, index=i) for i in self.tree.child_ids(self.index)]
+
+    @property
+    def is_root(self):
+        return self.index == self.tree.root
+
+    @property
+    def action(self):
+        action = self.tree.action[self.index]
+        return None if action < 0 else int(action)
+
+    @action.setter
+    def action(self, action):
+        self.tree.action[self.index] = -1 if action is None else action
+
+    @property
+    def player(self):
+        return int(self.tree.player[self.index])
+
+    @player.setter
+    def player(self, player):
+        self.tree.player[self.index] = player
+
+    """ Edge """
+    @property
+    def n(self):
+        return int(self.tree.n[self.index]) # 訪問回数 (visit count)
+
+    @property
+    def w(self):
+        return float(self.tree.w[self.index]) # 累計行動価値 (total action-value)
+
+    @property
+    def p(self):
+        return float(self.tree.p[self.index]) # 事前確率 (prior probability)
+
+    @property
+    def Q(self):
+        return float(self.tree.Q[self.index]) # 平均行動価値 (action-value)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title ParallelSelfPlay
+
+""" ParallelSelfPlay """
+import copy
+import numpy as np
+import torch
+from . MCTS import MCTS, Node
+from . SelfPlay import SelfPlay
+
+class ParallelSelfPlay(SelfPlay):
+    """
+    複数局を同時に進める自己対局クラス
+    各局は自分の探索木(MCTS)を持ち、全局のリーフの推論を1回のバッチにまとめる
+    データセットの形式は SelfPlay と同じ
+    """
+    def __init__(self, CFG, env, model, num_game=None):
+        super().__init__(CFG, env, model)
+
+        """ 推論結果のキャッシュは全局で共有 """
+        self.cache = self.agent.mcts.cache
+
+        """ 同時に進める対局数 """
+        if num_game is None:
+            num_game = getattr(CFG, 'num_parallel_game', 8)
+        self.num_game = num_game
+
+        """ CFG.seed を設定した場合は、局ごとに別の乱数列にする (同じ乱数だと全局が同じ手順になる) """
+        self.seed = getattr(CFG, 'seed', None)
+        self.num_started = 0
+
+    def __call__(self):
+        """ num_game局の自己対局を並行して行う """
+        games = [self.new_game() for _ in range(self.num_game)]
+        num_finished = 0
+
+        while len(games) > 0:
+            """ 全局のリーフを収集 """
+            leaves = []
+            for game in games:
+                mcts = game['mcts']
+                k = min(mcts.search_batch_size, self.CFG.num_simulation - game['num_simulation'])
+                game['leaves'], num_search = mcts.collect_leaves(game['node'], k)
+                game['num_simulation'] += num_search
+                leaves += game['leaves']
+
+            """ 全局まとめて推論 """
+            p, v = [], []
+            if len(leaves) > 0:
+                self.model.eval()
+                with torch.no_grad():
+                    features = torch.cat([features for _, features, _, _ in leaves])
+                    p, v = self.agent.mcts.evaluate(features)
+
+            i = 0
+            for game in games:
+                j = i + len(game['leaves'])
+                game['mcts'].backup_leaves(game['leaves'], p[i:j], v[i:j])
+                i = j
+
+            """ シミュレーションが終わった局は1手進める """
+            for game in games:
+                if game['num_simulation'] >= self.CFG.num_simulation:
+                    self.play_move(game)
+
+            finished = [game for game in games if game['done']]
+            games = [game for game in games if not game['done']]
+
+            for game in finished:
+                self.finish_game(game)
+                num_finished += 1
+                print('\r{}/{} games'.format(num_finished, self.num_game), end='')
+
+        self.finish_dataset()
+
+        return self.dataset
+
+    def new_game(self):
+        env = copy.deepcopy(self.env)
+        state = env.reset()
+
+        mcts = MCTS(env, self.model, self.CFG, train=True)
+        mcts.cache = self.cache
+
+        if self.seed is not None:
+            mcts.rng = np.random.default_rng([self.seed, self.num_started])
+        self.num_started += 1
+
+        game = {
+            'env': env,
+            'mcts': mcts,
+            'node': Node(self.CFG, state),
+            'play_count': 1,
+            'history': [], # (node, action)
+            'leaves': [],
+            'done': False,
+        }
+        self.start_move(game)
+
+        return game
+
+    def start_move(self, game):
+        game['mcts'].start_search(game['node'])
+        game['num_simulation'] = 0
+
+    def play_move(self, game):
+        """ 探索結果から手を決めて対局を進める """
+        node = game['node']
+        next_node = game['mcts'].end_search(node, game['play_count'])
+        action = next_node.action
+
+        _next_state, reward, done = game['env'].step(action)
+        game['history'].append((node, action))
+
+        if done:
+            game['done'] = True
+            game['reward'] = reward
+        else:
+            game['node'] = next_node
+            game['play_count'] += 1
+            self.start_move(game)
+
+    def finish_game(self, game):
+        """ SelfPlay.play と同じく、最後の手から符号を反転させながら履歴データを追加 """
+        v = -game['reward']
+
+        for node, action in reversed(game['history']):
+            self.backup(node, action, v)
+            v = -v
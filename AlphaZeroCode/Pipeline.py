@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title Pipeline
+
+""" Pipeline """
+import time
+import numpy as np
+import torch
+from . Train import Train
+from . ReplayBuffer import ReplayBuffer
+from . MemmapDataset import MemmapDataset
+from . SelfPlayPool import SelfPlayPool
+
+
+class Pipeline():
+    """
+    非同期の自己対局・学習パイプライン (継続学習)
+    自己対局のワーカー (SelfPlayPool) は対局を続けて終局したデータを送り、
+    学習側は同時にリプレイバッファからミニバッチを取り出して学習し、CFG.publish_interval ステップごとに重みを配布する
+
+    サンプルの再利用率 (学習に使ったサンプル数 / 生成したサンプル数) が CFG.sample_reuse を超えそうなら、
+    学習を止めて対局を待つ
+
+    Usage:
+    with Pipeline(CFG, env, model) as pipeline:
+        pipeline.run(num_step=10000, report_interval=500)
+    """
+    def __init__(self, CFG, env, model, num_worker=None):
+        self.CFG = CFG
+        self.model = model
+
+        self.publish_interval = getattr(CFG, 'publish_interval', 100)
+        self.sample_reuse = getattr(CFG, 'sample_reuse', 4)
+        self.min_replay_size = getattr(CFG, 'min_replay_size', CFG.batch_size)
+
+        if hasattr(CFG, 'memmap_dataset_path'):
+            self.replay_buffer = MemmapDataset(CFG)
+        else:
+            self.replay_buffer = ReplayBuffer(CFG)
+
+        self.train = Train(model, CFG)
+        self.pool = SelfPlayPool(CFG, env, model, num_worker)
+        self.rng = np.random.default_rng(getattr(CFG, 'seed', None))
+
+        """ 統計 """
+        self.num_step = 0
+        self.num_game = 0
+        self.num_sample = 0     # 生成したサンプル数
+        self.version_lag = 0    # 対局に使った重みの古さ (配布回数) の合計
+        self.train_time = 0.0   # 学習側: ミニバッチの取り出しと更新
+        self.wait_time = 0.0    # 学習側: 対局の待ち
+        self.actor_time = 0.0   # 自己対局側: 対局にかかった時間の合計
+        self.start_time = None
+
+        self.report_step = 0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def start(self):
+        self.pool.start()
+        self.start_time = time.perf_counter()
+
+    def close(self):
+        self.pool.close()
+
+        if hasattr(self.replay_buffer, 'flush'):
+            self.replay_buffer.flush()
+
+    def receive(self, timeout=0):
+        """ 終局した対局をリプレイバッファに追加 (timeout秒まで1局目を待つ) """
+        game = self.pool.get(timeout=timeout)
+
+        while game is not None:
+            self.replay_buffer.extend(game['dataset'])
+
+            self.num_game += 1
+            self.num_sample += len(game['dataset'])
+            self.version_lag += self.pool.version.value - game['version']
+            self.actor_time += game['time']
+
+            game = self.pool.get(timeout=0)
+
+    def can_train(self):
+        """ リプレイバッファが溜まっていて、再利用率の上限を超えない """
+        if len(self.replay_buffer) < self.min_replay_size:
+            return False
+
+        return (self.num_step + 1) * self.CFG.batch_size <= self.num_sample * self.sample_reuse
+
+    def step(self):
+        """ 1ミニバッチの学習 """
+        start = time.perf_counter()
+
+        arrays = self.replay_buffer.sample(self.CFG.batch_size, self.rng)
+        input_features, pi, z = [torch.from_numpy(array).to(self.CFG.device) for array in arrays]
+
+        if self.train.symmetry is not None:
+            input_features, pi, z = self.train.symmetry.augment(input_features, pi, z, self.train.num_symmetry)
+
+        self.model.train()
+        self.train.update(input_features, pi, z)
+        self.num_step += 1
+
+        if self.num_step % self.publish_interval == 0:
+            self.pool.publish(self.model)
+
+        self.train_time += time.perf_counter() - start
+
+    def run(self, num_step, report_interval=None):
+        """ num_step ステップ学習する (自己対局はその間も続く) """
+        if self.start_time is None:
+            self.start()
+
+        last_step = self.num_step + num_step
+
+        while self.num_step < last_step:
+            self.receive()
+
+            if self.can_train():
+                self.step()
+            else:
+                start = time.perf_counter()
+                self.receive(timeout=1.0)
+                self.wait_time += time.perf_counter() - start
+
+                """ 対局を待つ間にワーカーが終了していたら中断 (RuntimeError) """
+                self.pool.check_workers()
+
+            if report_interval and self.num_step - self.report_step >= report_interval:
+                self.show_stats()
+
+        """ 最後の重みを配布 """
+        self.pool.publish(self.model)
+
+    def stats(self):
+        elapsed = time.perf_counter() - self.start_time
+
+        return {
+            'step': self.num_step,
+            'version': self.pool.version.value,
+            'games': self.num_game,
+            'samples': self.num_sample,
+            'replay': len(self.replay_buffer),
+            'reuse': self.num_step * self.CFG.batch_size / max(self.num_sample, 1),
+            'games/sec': self.num_game / elapsed,
+            'steps/sec': self.num_step / elapsed,
+            'version lag': self.version_lag / max(self.num_game, 1),
+            'learner utilization': self.train_time / elapsed,
+            'learner wait': self.wait_time / elapsed,
+            'actor utilization': self.actor_time / (self.pool.num_worker * elapsed),
+        }
+
+    def show_stats(self):
+        """ 統計と、前回の表示からの平均損失 """
+        stats = self.stats()
+        num_step = max(self.num_step - self.report_step, 1)
+
+        print('step {step} (v{version})  games {games}  samples {samples}  replay {replay}  reuse {reuse:.2f}'
+              .format(**stats))
+        print('  {:.2f} games/s  {:.1f} steps/s  version lag {:.2f}  learner {:.0%} (wait {:.0%})  actors {:.0%}'
+              .format(stats['games/sec'], stats['steps/sec'], stats['version lag'],
+                      stats['learner utilization'], stats['learner wait'], stats['actor utilization']))
+        print('  pi_loss: {:.5f} value_loss: {:.5f}'
+              .format(float(self.train.running_loss_policy) / num_step, float(self.train.running_loss_value) / num_step))
+
+        self.train.running_loss_policy = 0.0
+        self.train.running_loss_value = 0.0
+        self.report_step = self.num_step
@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title ReplayBuffer
+
+""" ReplayBuffer """
+from collections.abc import Sequence
+import numpy as np
+
+
+class ReplayBuffer(Sequence):
+    """
+    経験データのリングバッファ (SelfPlay.dataset の代わりに使える)
+    入力特徴 (0/1 の平面) は uint8 にビット圧縮、pi は float16、z は int8 の配列に保持する
+    最大サイズ (CFG.max_dataset_size) を超えたら古いものから上書きする (追加は O(1))
+    デバッグ用の plain データは CFG.replay_buffer_plain = True の場合だけ保持する
+
+    1件ずつ取り出すと、従来と同じ [input_features, pi, [z], plain] のリストを返す
+    ファイルには pickle を使わない npz 形式で保存する (plain データは保存しない)
+    """
+    def __init__(self, CFG, capacity=None, keep_plain=None):
+        self.CFG = CFG
+
+        if capacity is None:
+            capacity = CFG.max_dataset_size
+        if keep_plain is None:
+            keep_plain = getattr(CFG, 'replay_buffer_plain', False)
+
+        self.capacity = capacity
+        self.keep_plain = keep_plain
+
+        """ 配列は最初のデータの入力特徴の形 [C, W, W] に合わせて確保 """
+        self.feature_shape = None
+        self.planes = None
+        self.pi = None
+        self.z = None
+        self.plain = [None] * capacity if keep_plain else None
+
+        self.head = 0 # 次に書き込む位置
+        self.size = 0
+
+    def allocate(self, feature_shape):
+        self.feature_shape = tuple(int(x) for x in feature_shape)
+        num_bytes = (int(np.prod(self.feature_shape)) + 7) // 8
+
+        self.planes = np.zeros((self.capacity, num_bytes), dtype=np.uint8)
+        self.pi = np.zeros((self.capacity, self.CFG.action_size), dtype=np.float16)
+        self.z = np.zeros(self.capacity, dtype=np.int8)
+
+    def __len__(self):
+        return self.size
+
+    def position(self, index):
+        """ 古い順の番号 -> 配列上の位置 """
+        return (self.head - self.size + index) % self.capacity
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.size))]
+
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError('ReplayBuffer index out of range')
+
+        i = self.position(index)
+        features = np.unpackbits(self.planes[i], count=int(np.prod(self.feature_shape))).reshape(self.feature_shape)
+        plain = self.plain[i] if self.plain is not None else None
+
+        return [features.astype(np.float32).tolist(), self.pi[i].astype(np.float32).tolist(), [int(self.z[i])], plain]
+
+    def append(self, data):
+        """ [input_features, pi, [z], plain] を1件追加 """
+        features = np.asarray(data[0], dtype=np.uint8)
+
+        if self.planes is None:
+            self.allocate(features.shape)
+
+        i = self.head
+        self.planes[i] = np.packbits(features.reshape(-1))
+        self.pi[i] = data[1]
+        self.z[i] = data[2][0]
+
+        if self.plain is not None:
+            self.plain[i] = data[3] if len(data) > 3 else None
+
+        self.head = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def extend(self, dataset):
+        for data in dataset:
+            self.append(data)
+        return self
+
+    def __iadd__(self, dataset):
+        return self.extend(dataset)
+
+    def clear(self):
+        self.head = 0
+        self.size = 0
+        if self.plain is not None:
+            self.plain = [None] * self.capacity
+
+    def arrays(self, indices):
+        """ 番号の配列から (入力特徴 [B, C, W, W], pi [B, action_size], z [B, 1]) を float32 でまとめて取り出す """
+        B = len(indices)
+        out = (np.empty((B,) + self.feature_shape, dtype=np.float32),
+               np.empty((B, self.CFG.action_size), dtype=np.float32),
+               np.empty((B, 1), dtype=np.float32))
+
+        return self.gather(indices, out)
+
+    def gather(self, indices, out):
+        """ arrays() と同じ内容を、確保済みの float32 配列 out = (入力特徴, pi, z) の先頭 B 件に書き込む """
+        positions = self.position(np.asarray(indices))
+        B = len(positions)
+        features, pi, z = out
+
+        bits = np.unpackbits(self.planes[positions], axis=1, count=int(np.prod(self.feature_shape)))
+        np.copyto(features[:B].reshape(B, -1), bits)
+        pi[:B] = self.pi[positions]
+        z[:B, 0] = self.z[positions]
+
+        return features[:B], pi[:B], z[:B]
+
+    def sample(self, batch_size, rng=None):
+        """ 一様ランダム (復元抽出) なミニバッチ。番号は配列上の順に並べて読む """
+        if rng is None:
+            rng = np.random.default_rng()
+
+        indices = np.sort(rng.integers(0, self.size, size=batch_size))
+        return self.arrays(indices)
+
+    @property
+    def nbytes(self):
+        if self.planes is None:
+            return 0
+        return self.planes.nbytes + self.pi.nbytes + self.z.nbytes
+
+    def save(self, filepath):
+        """ 古い順に並べて npz 形式で保存 """
+        positions = self.position(np.arange(self.size))
+
+        with open(filepath, 'wb') as f:
+            np.savez(f,
+                     feature_shape=np.array(self.feature_shape or (), dtype=np.int64),
+                     planes=self.planes[positions] if self.size > 0 else np.zeros((0, 0), dtype=np.uint8),
+                     pi=self.pi[positions] if self.size > 0 else np.zeros((0, self.CFG.action_size), dtype=np.float16),
+                     z=self.z[positions] if self.size > 0 else np.zeros(0, dtype=np.int8))
+
+    def load(self, filepath):
+        """ save() したファイルを読み込む (容量を超える分は古いものから捨てる) """
+        with np.load(filepath) as data:
+            self.clear()
+
+            if len(data['z']) == 0:
+                return self
+
+            self.allocate(data['feature_shape'])
+
+            count = min(len(data['z']), self.capacity)
+            self.planes[:count] = data['planes'][-count:]
+            self.pi[:count] = data['pi'][-count:]
+            self.z[:count] = data['z'][-count:]
+
+            self.head = count % self.capacity
+            self.size = count
+
+        return self
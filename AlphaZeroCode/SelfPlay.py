@@ -7,6 +7,8 @@ import copy
 from . Util import Util
 from . MCTS import Node
 from . Agent import Agent
+from . ReplayBuffer import ReplayBuffer
+from . MemmapDataset import MemmapDataset
 
 class SelfPlay():
     """ 経験を収集する自己対局クラス """
@@ -16,7 +18,16 @@ class SelfPlay():
         self.CFG = CFG
         self.util = Util(CFG)
         
-        self.dataset = []
+        """
+        CFG.memmap_dataset_path を設定した場合は、ファイル上のリングバッファに蓄積
+        CFG.replay_buffer = True なら、経験データを圧縮したメモリ上のリングバッファに蓄積
+        """
+        if hasattr(CFG, 'memmap_dataset_path'):
+            self.dataset = MemmapDataset(CFG)
+        elif getattr(CFG, 'replay_buffer', False):
+            self.dataset = ReplayBuffer(CFG)
+        else:
+            self.dataset = []
         self.agent = Agent(env, model, CFG, train=True)
 
 
@@ -26,11 +37,20 @@ class SelfPlay():
         node = Node(self.CFG, state)
         self.play(node)
 
-        """ 蓄積した経験データのセットを最大サイズで切り捨て """
-        self.dataset = self.dataset[-self.CFG.max_dataset_size:]
+        self.finish_dataset()
 
         return self.dataset
 
+    def finish_dataset(self):
+        """ 対局後のデータセットの後処理 """
+        if isinstance(self.dataset, list):
+            """ 蓄積した経験データのセットを最大サイズで切り捨て (リプレイバッファは追加時に上書き済み) """
+            self.dataset = self.dataset[-self.CFG.max_dataset_size:]
+
+        if hasattr(self.dataset, 'flush'):
+            """ ファイル上のデータセットは件数を更新 """
+            self.dataset.flush()
+
     def play(self, node, play_count=1):
         """ 探索の実行 """
         self.util.indicator(play_count)
@@ -67,10 +87,13 @@ class SelfPlay():
         
         # pi = one_hot_encording(node)     # 0 0 0 1 
         pi = self.util.probability_distribution(node) # 0.1 0.2 0.3 0.4 
+        p, p_noise = self.util.prior_distribution(node) # 事前確率 (ノイズなし/あり)
 
         plain = { # for debug
                  'state': states[0], 
                  'pi': pi,
+                 'p': p,
+                 'p_noise': p_noise,
                  'z': v,        
                  'states': states,
                  'player': node.player,
@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title SelfPlayPool
+
+""" SelfPlayPool """
+import os
+import sys
+import copy
+import time
+import queue
+import random
+import traceback
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+from . SelfPlay import SelfPlay
+
+
+def self_play_worker(worker_id, CFG, env, shared_model, version, lock, game_queue, stop_event):
+    """
+    ワーカープロセス: 共有メモリ上の重みをローカルのモデルに写してから1局ずつ自己対局
+    重みが更新されていたら次の対局の前に読み直す
+    例外で終了する場合は、トレースバックを {'worker', 'error'} としてキューに送る
+    """
+    try:
+        self_play_loop(worker_id, CFG, env, shared_model, version, lock, game_queue, stop_event)
+    except BaseException:
+        game_queue.put({'worker': worker_id, 'error': traceback.format_exc()})
+        raise
+
+
+def self_play_loop(worker_id, CFG, env, shared_model, version, lock, game_queue, stop_event):
+    torch.set_num_threads(1)
+
+    """ ワーカーは推論をCPUで行い、進捗表示は出さない """
+    CFG.device = 'cpu'
+    sys.stdout = open(os.devnull, 'w')
+
+    seed = getattr(CFG, 'seed', None)
+    if seed is not None:
+        random.seed(seed + worker_id)
+        np.random.seed(seed + worker_id)
+        torch.manual_seed(seed + worker_id)
+        CFG.seed = seed + worker_id
+
+    model = copy.deepcopy(shared_model)
+    self_play = SelfPlay(CFG, env, model)
+    model_version = -1
+
+    while not stop_event.is_set():
+        if model_version != version.value:
+            with lock:
+                model.load_state_dict(shared_model.state_dict())
+                model_version = version.value
+
+        self_play.dataset = []
+        start = time.perf_counter()
+        dataset = self_play()
+
+        game_queue.put({'worker': worker_id, 'version': model_version, 'dataset': dataset,
+                        'time': time.perf_counter() - start})
+
+
+class SelfPlayPool():
+    """
+    複数のプロセスで自己対局を行い、終局したデータをキューで学習側へ送る
+    モデルの重みは共有メモリに置き、publish() で全ワーカーに配布する
+
+    Usage:
+    with SelfPlayPool(CFG, env, model) as pool:
+        dataset = pool.collect(num_game=100)
+        ...
+        pool.publish(model) # 学習した重みを配布
+    """
+    def __init__(self, CFG, env, model, num_worker=None):
+        self.CFG = CFG
+        self.env = env
+
+        if num_worker is None:
+            num_worker = getattr(CFG, 'num_self_play_worker', max(mp.cpu_count() - 1, 1))
+        self.num_worker = num_worker
+
+        self.ctx = mp.get_context(getattr(CFG, 'mp_start_method', 'fork'))
+
+        """ 共有メモリ上のモデルと、重みのバージョン """
+        self.shared_model = copy.deepcopy(model).cpu()
+        self.shared_model.share_memory()
+        self.version = self.ctx.Value('i', 0)
+        self.lock = self.ctx.Lock()
+
+        self.game_queue = self.ctx.Queue()
+        self.stop_event = self.ctx.Event()
+        self.workers = []
+
+        """ games/sec の計測 """
+        self.num_game = 0
+        self.start_time = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def start(self):
+        for worker_id in range(self.num_worker):
+            worker = self.ctx.Process(target=self_play_worker,
+                                      args=(worker_id, self.CFG, self.env, self.shared_model, self.version,
+                                            self.lock, self.game_queue, self.stop_event),
+                                      daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+        self.start_time = time.perf_counter()
+
+    def publish(self, model):
+        """ 学習した重みを共有メモリに書き込み、バージョンを更新 """
+        state_dict = model.state_dict()
+
+        with self.lock:
+            with torch.no_grad():
+                for name, tensor in self.shared_model.state_dict().items():
+                    tensor.copy_(state_dict[name])
+            self.version.value += 1
+
+        return self.version.value
+
+    def get(self, timeout=None):
+        """
+        終局した1局分のデータ {'worker', 'version', 'dataset', 'time'} を受け取る (timeoutでNone)
+        ワーカーが例外で終了していたら、そのトレースバック付きで RuntimeError
+        """
+        try:
+            game = self.game_queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+        if 'error' in game:
+            raise RuntimeError('self-play worker {} failed:\n{}'.format(game['worker'], game['error']))
+
+        self.num_game += 1
+        return game
+
+    def check_workers(self):
+        """ 停止していないのに終了したワーカーがあれば RuntimeError """
+        if self.stop_event.is_set():
+            return
+
+        for worker_id, worker in enumerate(self.workers):
+            if not worker.is_alive():
+                """ 終了前に送られたエラーがあれば、そのトレースバックを優先して報告 """
+                self.get(timeout=0.1)
+                raise RuntimeError('self-play worker {} (pid {}) exited with code {}'
+                                   .format(worker_id, worker.pid, worker.exitcode))
+
+    def collect(self, num_game, min_version=0, poll_interval=1.0):
+        """
+        num_game局分の経験データを受け取る (min_version より古い重みの対局は捨てる)
+        poll_interval 秒ごとにワーカーの生存を確認し、終了したワーカーがあれば RuntimeError
+        """
+        dataset = []
+        count = 0
+
+        while count < num_game:
+            game = self.get(timeout=poll_interval)
+            if game is None:
+                self.check_workers()
+                continue
+            if game['version'] < min_version:
+                continue
+            dataset += game['dataset']
+            count += 1
+
+        return dataset
+
+    @property
+    def games_per_sec(self):
+        if self.start_time is None:
+            return 0.0
+        return self.num_game / (time.perf_counter() - self.start_time)
+
+    def close(self, timeout=30):
+        """ 対局中の局が終わるのを待ってワーカーを停止 """
+        self.stop_event.set()
+        deadline = time.perf_counter() + timeout
+
+        """ キューに残ったデータを受け取らないとワーカーが終了できない """
+        while any(worker.is_alive() for worker in self.workers) and time.perf_counter() < deadline:
+            try:
+                self.game_queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+        for worker in self.workers:
+            if worker.is_alive():
+                worker.terminate()
+            worker.join()
+
+        self.workers = []
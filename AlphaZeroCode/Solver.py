@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title Solver
+
+""" Solver """
+import os
+import sys
+import numpy as np
+
+
+""" 到達しない局面の価値 """
+UNREACHABLE = -2
+
+""" 表を作れる最大の盤の幅 (表は 3 ** (幅 * 幅) 要素。4x4 で約4300万、5x5 では作れない) """
+MAX_WIDTH = 3
+
+
+class Solver():
+    """
+    TicTacToe の完全解析表
+    初手から到達できる全局面を1度だけ解き、手番側から見た正確な価値 (1: 勝ち, 0: 引き分け, -1: 負け) と
+    最善手の集合 (ビットマスク) を、盤面を3進数にした番号で引ける配列に保持する (問い合わせは O(1))
+    表は最初の問い合わせで作り、CFG.solver_path (既定 ~/.cache/AlphaZeroCode/solver_3x3.npz) に保存して次回から読み込む
+    盤面の番号は、マスの値 (0, -1, 1) を 3 で割った余り (0, 2, 1) を桁とする3進数
+    盤の幅が MAX_WIDTH より大きい場合は ValueError (Accuracy には正解付きの局面を test_set で渡す)
+
+    Usage:
+    solver = Solver(CFG)
+    solver.value(env.state)         # 手番側から見た価値
+    solver.best_actions(env.state)  # 最善手のリスト
+    """
+    def __init__(self, CFG, path=None):
+        self.CFG = CFG
+        self.width = CFG.board_width
+        self.size = self.width * self.width
+
+        if self.width > MAX_WIDTH:
+            raise ValueError('Solver: board_width {} is too large for the full table (3 ** {} entries, max width {})'
+                             .format(self.width, self.size, MAX_WIDTH))
+
+        if path is None:
+            default = os.path.join('~', '.cache', 'AlphaZeroCode', 'solver_{0}x{0}.npz'.format(self.width))
+            path = getattr(CFG, 'solver_path', default)
+        self.path = os.path.expanduser(path) if path else None
+
+        """ 盤面の番号の重み """
+        self.powers = 3 ** np.arange(self.size, dtype=np.int64)
+
+        """ 縦・横・斜めの並び """
+        w = self.width
+        lines = [[x1 * w + x2 for x2 in range(w)] for x1 in range(w)]
+        lines += [[x1 * w + x2 for x1 in range(w)] for x2 in range(w)]
+        lines += [[i * w + i for i in range(w)], [i * w + (w - 1 - i) for i in range(w)]]
+        self.lines = lines
+
+        """ 表 (最初の問い合わせで作成) """
+        self.values = None
+        self.best = None
+
+    def code(self, state):
+        """ 盤面の番号 """
+        cells = np.asarray(state, dtype=np.int64).reshape(-1) % 3
+        return int(cells @ self.powers)
+
+    def player(self, state):
+        """ 石の数から手番を求める """
+        cells = np.asarray(state).reshape(-1)
+        num_first = int(np.sum(cells == self.CFG.first_player))
+        num_second = int(np.sum(cells == self.CFG.second_player))
+        return self.CFG.first_player if num_first == num_second else self.CFG.second_player
+
+    def table(self):
+        """ 表を読み込むか作成して (価値, 最善手) を返す """
+        if self.values is None:
+            if not self.load():
+                self.solve()
+                if self.path is not None:
+                    self.save()
+
+        return self.values, self.best
+
+    def value(self, state):
+        """ 手番側から見た正確な価値 """
+        values, _ = self.table()
+        return int(values[self.code(state)])
+
+    def best_mask(self, state):
+        """ 最善手のビットマスク """
+        _, best = self.table()
+        return int(best[self.code(state)])
+
+    def best_actions(self, state):
+        mask = self.best_mask(state)
+        return [action for action in range(self.size) if mask >> action & 1]
+
+    def is_best(self, state, action):
+        return bool(self.best_mask(state) >> action & 1)
+
+    def positions(self):
+        """ 到達できる全局面のうち、終局していない局面の番号 """
+        values, best = self.table()
+        return np.flatnonzero((values != UNREACHABLE) & (best != 0))
+
+    def decode(self, code):
+        """ 盤面の番号から盤面 (リストのリスト) """
+        digits = (int(code) // self.powers) % 3
+        cells = np.where(digits == 2, -1, digits)
+        return cells.reshape(self.width, self.width).tolist()
+
+    def solve(self):
+        """ 初手から全局面を深さ優先で解く (手番側から見たネガマックス) """
+        self.values = np.full(3 ** self.size, UNREACHABLE, dtype=np.int8)
+        self.best = np.zeros(3 ** self.size, dtype=np.uint16 if self.size <= 16 else np.uint32)
+
+        """ 手番のプレーヤーの石の桁の値 """
+        digit = {self.CFG.first_player: self.CFG.first_player % 3, self.CFG.second_player: self.CFG.second_player % 3}
+
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(limit, self.size * 4 + 100))
+        try:
+            self.negamax([0] * self.size, 0, self.CFG.first_player, digit)
+        finally:
+            sys.setrecursionlimit(limit)
+
+    def negamax(self, cells, code, player, digit):
+        if self.values[code] != UNREACHABLE:
+            return int(self.values[code])
+
+        value = -1
+        best = 0
+        empty = [action for action in range(self.size) if cells[action] == 0]
+
+        if len(empty) == 0:
+            value = 0
+
+        for action in empty:
+            cells[action] = player
+            next_code = code + digit[player] * int(self.powers[action])
+
+            if self.is_win(cells, action, player):
+                """ 勝ちになる手 (相手の局面は終局として価値 -1 を登録) """
+                self.values[next_code] = -1
+                v = 1
+            else:
+                v = -self.negamax(cells, next_code, -player, digit)
+
+            cells[action] = 0
+
+            if v > value:
+                value, best = v, 0
+            if v == value:
+                best |= 1 << action
+
+        self.values[code] = value
+        self.best[code] = best
+        return value
+
+    def is_win(self, cells, action, player):
+        for line in self.lines:
+            if action in line and all(cells[i] == player for i in line):
+                return True
+        return False
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+
+        """ 書き込み途中のファイルを読まないよう、一時ファイルから置き換える """
+        tmp = self.path + '.tmp.npz'
+        np.savez_compressed(tmp, values=self.values, best=self.best,
+                            first_player=self.CFG.first_player, width=self.width)
+        os.replace(tmp, self.path)
+
+    def load(self):
+        """ 保存した表を読み込む (ファイルがないか、別の設定の表なら False) """
+        if self.path is None or not os.path.exists(self.path):
+            return False
+
+        with np.load(self.path) as data:
+            if int(data['width']) != self.width or int(data['first_player']) != self.CFG.first_player:
+                return False
+            self.values = data['values']
+            self.best = data['best']
+
+        return True
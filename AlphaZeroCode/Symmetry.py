@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title Symmetry
+
+""" Symmetry """
+import numpy as np
+import torch
+
+
+class Symmetry():
+    """
+    正方形の盤面の8つの対称変換 (回転4 × 左右反転2)
+    変換 k: 0-3 は 90度 × k の回転、4-7 はさらに左右反転
+    入力特徴 [B, C, W, W] と方策 [B, action_size] を、局面ごとの変換でまとめて変換する
+    盤面以外の行動 (パスなど) は変換しない
+    """
+    def __init__(self, CFG):
+        self.CFG = CFG
+        W = CFG.board_width
+
+        """ 変換後のマス i には、元のマス perm[k, i] の値が入る """
+        board = np.arange(W * W).reshape(W, W)
+        perm = []
+        for k in range(8):
+            b = np.rot90(board, k % 4)
+            if k >= 4:
+                b = np.fliplr(b)
+            perm.append(b.reshape(-1))
+        self.perm = np.array(perm)
+
+        """ 逆変換の番号 """
+        self.inverse = np.array([[np.array_equal(self.perm[k][self.perm[j]], board.reshape(-1)) for j in range(8)].index(True)
+                                 for k in range(8)])
+
+        """ 方策用: 盤面外の行動はそのまま """
+        extra = np.arange(W * W, CFG.action_size)
+        self.policy_perm = np.array([np.concatenate([p, extra]) for p in self.perm])
+
+    def random_transforms(self, size, rng):
+        """ 局面ごとにランダムな変換 [size] (rng: np.random.Generator) """
+        return rng.integers(0, 8, size=size)
+
+    def transform_features(self, features, k):
+        """ 入力特徴 [B, C, W, W] を局面ごとの変換 k [B] で変換 """
+        B, C = features.shape[:2]
+        index = torch.as_tensor(self.perm[k], device=features.device).reshape(B, 1, -1).expand(B, C, -1)
+        return torch.gather(features.reshape(B, C, -1), 2, index).reshape(features.shape)
+
+    def transform_policy(self, pi, k):
+        """ 方策 [B, action_size] を局面ごとの変換 k [B] で変換 """
+        index = torch.as_tensor(self.policy_perm[k], device=pi.device)
+        return torch.gather(pi, 1, index)
+
+    def transform_states(self, states):
+        """ 局面履歴 [H, W, W] の8通りの変換 [8, H, W*W] """
+        states = np.asarray(states).reshape(len(states), -1)
+        return states[:, self.perm].transpose(1, 0, 2)
+
+    def augment(self, input_features, pi, z, num=8, rng=np.random):
+        """
+        1つのサンプルから、重複しない num 通りの変換を作る (バッチサイズは num 倍)
+        num=1 ならサンプルごとにランダムな1つの変換
+        """
+        B = len(input_features)
+        k = np.argsort(rng.random((B, 8)), axis=1)[:, :num].reshape(-1)
+
+        input_features = input_features.repeat_interleave(num, dim=0)
+        pi = pi.repeat_interleave(num, dim=0)
+        z = z.repeat_interleave(num, dim=0)
+
+        return self.transform_features(input_features, k), self.transform_policy(pi, k), z
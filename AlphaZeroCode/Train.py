@@ -3,7 +3,6 @@
 # @title Train
 
 import math
-import random
 import copy
 from tqdm import tqdm
 
@@ -13,6 +12,9 @@ import torch.nn as nn
 import torch.optim as optim
 
 from . Util import Util
+from . Symmetry import Symmetry
+from . BatchLoader import BatchLoader
+from . Accuracy import Accuracy
 
 class Train():
     
@@ -26,6 +28,14 @@ class Train():
         self.learning_rate = None
         self.num_epoch = CFG.num_epoch
 
+        """ 盤面の対称変換によるデータ拡張: 1サンプルから作る変換の数 (1-8) """
+        self.num_symmetry = getattr(CFG, 'symmetry_augmentation', 1)
+        self.symmetry = Symmetry(CFG) if hasattr(CFG, 'symmetry_augmentation') else None
+
+        """ 学習ごとに完全解析表 (または CFG.accuracy_test_path の局面) に対する精度を測る (CFG.accuracy_benchmark = True の場合) """
+        self.accuracy = Accuracy(CFG) if getattr(CFG, 'accuracy_benchmark', False) else None
+        self.accuracy_history = []
+
         self.optimizer = optim.SGD(self.model.parameters(), 
                                    lr=CFG.learning_rate, 
                                    momentum=0.9, 
@@ -42,16 +52,17 @@ class Train():
         if batch_iteration_size == 0:
             batch_iteration_size = 1
 
+        """ ミニバッチは、再利用するテンソルに背景スレッドで先読みして組み立てる """
+        loader = BatchLoader(self.CFG, dataset)
+
         """ Train loop """
         for epoch in (range(1, self.num_epoch + 1)):
 
-            """ 全データセットをシャッフル """
-            dataset = random.sample(dataset, len(dataset)) # 再定義しているので問題ない
+            for input_features, pi, z in loader:
 
-            # iteration_size = math.ceil(len(dataset) / self.CFG.batch_size)
+                if self.symmetry is not None:
+                    input_features, pi, z = self.symmetry.augment(input_features, pi, z, self.num_symmetry)
 
-            for i in range(0, len(dataset), self.CFG.batch_size):
-                input_features, pi, z = self.util.make_batch(dataset[i:i + self.CFG.batch_size])
                 self.update(input_features, pi, z)
 
             self.util.output_train_log(epoch, self.running_loss_policy, self.running_loss_value, batch_iteration_size)
@@ -59,6 +70,10 @@ class Train():
             self.running_loss_policy = 0.0
             self.running_loss_value = 0.0
 
+        if self.accuracy is not None:
+            result = self.accuracy(self.model)
+            self.accuracy.show_result(result)
+            self.accuracy_history.append(result)
 
     def update(self, input_features,  pi, z):
         """ 
@@ -89,5 +104,5 @@ class Train():
         self.optimizer.step()
 
         """ Running loss """
-        self.running_loss_policy += policy_loss
-        self.running_loss_value += value_loss
+        self.running_loss_policy += policy_loss.detach() # 計算グラフを保持しない
+        self.running_loss_value += value_loss.detach()
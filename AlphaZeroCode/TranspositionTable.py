@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title TranspositionTable
+
+""" TranspositionTable """
+from collections import OrderedDict
+import numpy as np
+from . Zobrist import Zobrist
+
+
+class TranspositionTable():
+    """
+    局面のハッシュ値から、探索木で展開済みのノードIDを引くLRUテーブル
+    手順が違っても同じ局面に着いたリーフは、展開済みノードの子ノード配列を共有する (探索木がDAGになる)
+    メモリの上限 (CFG.transposition_table_mb) を超えたら古いものから対応を捨てる (ノード自体は探索木に残る)
+    """
+    def __init__(self, CFG, max_mb=None, seed=0):
+        self.CFG = CFG
+
+        if max_mb is None:
+            max_mb = getattr(CFG, 'transposition_table_mb', 16)
+
+        """ 1エントリのおおよそのバイト数 (キー・ノードID・辞書のオーバーヘッド) """
+        entry_bytes = 150
+        self.max_size = max(int(max_mb * 1024 * 1024 // entry_bytes), 1)
+
+        self.zobrist = Zobrist(CFG, seed)
+        self.table = OrderedDict()
+
+        """ テーブルが参照している探索木 """
+        self.tree = None
+
+        """ 統計 """
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.table)
+
+    def key(self, states, player):
+        """ 局面履歴と手番のハッシュ値 """
+        return self.zobrist(states, player)
+
+    def get(self, key):
+        """ 展開済みのノードID (未登録ならNone) """
+        index = self.table.get(key)
+
+        if index is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.table.move_to_end(key)
+        return index
+
+    def put(self, key, index):
+        self.table[key] = index
+        self.table.move_to_end(key)
+
+        while len(self.table) > self.max_size:
+            self.table.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.table.clear()
+        self.tree = None
+
+    def rebuild(self, tree):
+        """ 新しい探索木 (再利用した部分木) の展開済みノードを登録し直す """
+        self.table.clear()
+        self.tree = tree
+
+        for index in np.nonzero(tree.child_count[:tree.size])[0]:
+            index = int(index)
+            if index in tree.states:
+                self.put(self.key(tree.states[index], tree.player[index]), index)
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+    def show_stats(self):
+        print('transposition table: size {}/{}  hits {}  misses {}  hit rate {:.1%}  evictions {}'
+              .format(len(self.table), self.max_size, self.hits, self.misses, self.hit_rate, self.evictions))
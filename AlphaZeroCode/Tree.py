@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title Tree
+
+""" Import libraries Original """
+import copy
+import numpy as np
+from . Util import Util
+
+
+class Tree():
+    """
+    Tree: 探索木の統計量をノードIDで引くNumPy配列に保持
+    子ノードは連続したIDに確保し、child_offset と child_count で参照する
+    局面の履歴は展開済みノードにだけ持たせ、それ以外は必要な時に親から再構築する
+    """
+    def __init__(self, CFG, capacity=None):
+        self.CFG = CFG
+        self.util = Util(CFG)
+
+        if capacity is None:
+            capacity = getattr(CFG, 'tree_capacity', CFG.num_simulation * CFG.action_size + 1)
+
+        self.capacity = capacity
+        self.size = 0
+        self.root = 0
+
+        """ Edge """
+        self.n = np.zeros(capacity, dtype=np.int32)   # 訪問回数 (visit count)
+        self.w = np.zeros(capacity, dtype=np.float32) # 累計行動価値 (total action-value)
+        self.p = np.zeros(capacity, dtype=np.float32) # 事前確率 (prior probability)
+        self.Q = np.zeros(capacity, dtype=np.float32) # 平均行動価値 (action-value)
+        self.action = np.full(capacity, -1, dtype=np.int32)
+
+        """ Node """
+        self.player = np.zeros(capacity, dtype=np.int8)
+        self.parent = np.full(capacity, -1, dtype=np.int32)
+        self.child_offset = np.zeros(capacity, dtype=np.int32)
+        self.child_count = np.zeros(capacity, dtype=np.int32)
+
+        """ 展開済みノードの局面履歴と行動履歴 """
+        self.states = {}
+        self.actions = {}
+
+        """ 探索ルートの子ノードに対する、ノイズ付きの事前確率 """
+        self.p_noise = {}
+
+    def reserve(self, count):
+        """ 配列が不足する場合は倍に拡張 """
+        if self.size + count <= self.capacity:
+            return
+
+        capacity = max(self.capacity * 2, self.size + count)
+
+        for name in ['n', 'w', 'p', 'Q', 'action', 'player', 'parent', 'child_offset', 'child_count']:
+            array = getattr(self, name)
+            fill = -1 if name in ('action', 'parent') else 0
+            new_array = np.full(capacity, fill, dtype=array.dtype)
+            new_array[:self.size] = array[:self.size]
+            setattr(self, name, new_array)
+
+        self.capacity = capacity
+
+    def add_node(self, player=None):
+        """ 親を持たないノード (ルート) を追加 """
+        self.reserve(1)
+        index = self.size
+        self.size += 1
+        self.player[index] = self.CFG.first_player if player is None else player
+        return index
+
+    def add_child_nodes(self, index, actions, p, player):
+        """ 子ノードを連続したIDにまとめて追加 """
+        count = len(actions)
+        self.reserve(count)
+
+        offset = self.size
+        end = offset + count
+        self.size = end
+
+        self.action[offset:end] = actions
+        self.p[offset:end] = p
+        self.player[offset:end] = player
+        self.parent[offset:end] = index
+
+        self.child_offset[index] = offset
+        self.child_count[index] = count
+
+    def link(self, index, other):
+        """ 同じ局面の展開済みノード (other) と子ノードの配列を共有 (トランスポジション) """
+        self.child_offset[index] = self.child_offset[other]
+        self.child_count[index] = self.child_count[other]
+
+    def child_ids(self, index):
+        offset = self.child_offset[index]
+        return range(offset, offset + self.child_count[index])
+
+    def is_pass(self, index):
+        return hasattr(self.CFG, 'pass_') and self.action[index] == self.CFG.pass_
+
+    def set_states(self, index, state):
+        """ 展開するノードの履歴を、親の履歴と現在の局面から作成 """
+        parent_states = self.states[self.parent[index]]
+
+        if self.is_pass(index):
+            self.states[index] = list(parent_states)
+        else:
+            """ 過去の局面は親と共有する """
+            self.states[index] = [copy.deepcopy(state)] + parent_states[:-1]
+
+        return self.states[index]
+
+    def get_states(self, index, env=None):
+        """ 局面履歴を取得。未展開ノードは親から再構築する """
+        if index in self.states:
+            return self.states[index]
+
+        parent = self.parent[index]
+        if parent < 0:
+            return None
+
+        states = self.get_states(parent, env)
+        action = int(self.action[index])
+
+        if self.is_pass(index):
+            next_states = copy.deepcopy(states)
+        else:
+            if env is not None:
+                env = copy.deepcopy(env)
+                env.state = copy.deepcopy(states[0])
+            next_states = self.util.get_next_states(states, action, int(self.player[parent]), env)
+
+        self.states[index] = next_states
+        return next_states
+
+    def get_actions(self, index):
+        """ 行動履歴を取得。未保持のノードは親から再構築する """
+        if index in self.actions:
+            return self.actions[index]
+
+        parent = self.parent[index]
+        return self.util.get_next_actions(self.get_actions(parent), int(self.action[index]))
+
+    def extract_subtree(self, index):
+        """
+        indexを根とする部分木を、訪問回数を保ったまま新しい探索木に詰め直す
+        兄弟ノード以下は新しい探索木に含めないので、元の探索木と共に解放される
+        共有している子ノードの配列は1回だけコピーし、新しい探索木でも共有する
+        """
+        tree = Tree(self.CFG, capacity=max(self.capacity, 1))
+
+        root = tree.add_node(self.player[index])
+        for name in ['n', 'w', 'p', 'Q', 'action']:
+            getattr(tree, name)[root] = getattr(self, name)[index]
+
+        tree.states[root] = self.get_states(index)
+        tree.actions[root] = self.get_actions(index)
+
+        """ 展開済みのノードごとに、子ノードの配列をまとめてコピー """
+        queue = [(index, root)]
+        copied = {} # 元の子ノード配列の先頭ID -> コピー先のノードID
+        for old, new in queue:
+            count = self.child_count[old]
+            if count == 0:
+                continue
+
+            offset = self.child_offset[old]
+            if offset in copied:
+                tree.link(new, copied[offset])
+                continue
+            copied[offset] = new
+
+            old_ids = slice(offset, offset + count)
+            tree.add_child_nodes(new, self.action[old_ids], self.p[old_ids], self.player[old_ids])
+
+            new_offset = tree.child_offset[new]
+            new_ids = slice(new_offset, new_offset + count)
+            tree.n[new_ids] = self.n[old_ids]
+            tree.w[new_ids] = self.w[old_ids]
+            tree.Q[new_ids] = self.Q[old_ids]
+
+            for i in range(count):
+                if offset + i in self.states:
+                    tree.states[new_offset + i] = self.states[offset + i]
+
+            for i in np.nonzero(self.child_count[old_ids])[0]:
+                queue.append((offset + i, new_offset + i))
+
+        return tree
@@ -7,6 +7,7 @@ import copy
 import time
 from matplotlib import pyplot as plt
 import torch
+from . DatasetLog import DatasetLog
 
 
 class Util:
@@ -16,6 +17,9 @@ class Util:
         # 初回の最終更新時刻を取得
         self.last_mtime = 0.0
 
+        # 対人データのログ (CFG.sub_dataset_log_path を設定した場合)
+        self.sub_dataset_log = None
+
     def show_legal_actions(self, env):
         legal_actions = env.get_legal_actions()
         coord = []
@@ -34,6 +38,9 @@ class Util:
 
     # 対人データの追加処理
     def append_sub_dataset(self, dataset):
+        if hasattr(self.CFG, 'sub_dataset_log_path'):
+            return self.append_sub_dataset_log(dataset)
+
         # 対人データが更新されているか確認する処理
         def is_file_updated(file_path, last_mtime):
 
@@ -70,7 +77,28 @@ class Util:
             for data in sub_dataset:
                 dataset.append(data)
 
-            dataset = dataset[-self.CFG.max_dataset_size:]
+            if isinstance(dataset, list): # リプレイバッファは追加時に上書き済み
+                dataset = dataset[-self.CFG.max_dataset_size:]
+
+        return dataset
+
+    # 対人データのログから追加
+    def append_sub_dataset_log(self, dataset):
+        """ 前回以降にログへ追記されたサンプルだけを追加 (待機もファイル全体の読み直しもしない) """
+        if self.sub_dataset_log is None:
+            self.sub_dataset_log = DatasetLog(self.CFG)
+
+        sub_dataset = self.sub_dataset_log.read()
+
+        if len(sub_dataset) > 0:
+            print()
+            print('append sub_dataset', len(sub_dataset))
+
+            for data in sub_dataset:
+                dataset.append(data)
+
+            if isinstance(dataset, list): # リプレイバッファは追加時に上書き済み
+                dataset = dataset[-self.CFG.max_dataset_size:]
 
         return dataset
 
@@ -133,6 +161,11 @@ class Util:
             f.write('hidden_size:{}\n'.format(self.CFG.hidden_size))
 
     def save_dataset(self, filepath, dataset):
+        if hasattr(dataset, 'save'):
+            """ リプレイバッファは pickle を使わずに保存 """
+            dataset.save(filepath)
+            return
+
         try:
             dataset = np.array(dataset, dtype=object)
             # with open(filepath, 'wb') as f:
@@ -215,19 +248,6 @@ class Util:
             progress += "■"  # □
         print("\r" + progress + " " + str(play_count), end="手目")
 
-    def get_child_nodes(self, node):
-        child_nodes = []
-        for child_node in node.child_nodes:
-            edge = copy.copy(node)  # １次要素を複製
-            edge.p = copy.copy(child_node.p)
-            edge.w = child_node.w
-            edge.Q = child_node.Q
-            edge.n = child_node.n
-            edge.action = child_node.action
-            child_nodes.append(edge)
-
-        return child_nodes
-
     def create_states(self, state):
         state = copy.deepcopy(state)
         states = [[[0] * self.CFG.board_width] * self.CFG.board_width] * (self.CFG.history_size - 1)
@@ -288,8 +308,10 @@ class Util:
 
         n = np.array([0] * self.CFG.action_size)
 
-        for child_node in node.child_nodes:
-            n[child_node.action] = child_node.n
+        tree = node.tree
+        child_ids = tree.child_ids(node.index)
+        child_ids = slice(child_ids.start, child_ids.stop)
+        n[tree.action[child_ids]] = tree.n[child_ids]
 
         """ one hot vector """
         pi = [0] * self.CFG.action_size
@@ -302,8 +324,11 @@ class Util:
 
         pi = np.array([0] * self.CFG.action_size)
 
-        for child_node in node.child_nodes:
-            pi[child_node.action] = child_node.n
+        """ 探索木の配列から訪問回数を取得 """
+        tree = node.tree
+        child_ids = tree.child_ids(node.index)
+        child_ids = slice(child_ids.start, child_ids.stop)
+        pi[tree.action[child_ids]] = tree.n[child_ids]
 
         """ Normalize pi """
         pi_sum = pi.sum()
@@ -312,6 +337,21 @@ class Util:
 
         return pi.tolist()
 
+    def prior_distribution(self, node):
+        """ ログ用: ネットワークの事前確率と、ディリクレノイズを加えた事前確率 """
+        p = np.zeros(self.CFG.action_size)
+
+        tree = node.tree
+        child_ids = tree.child_ids(node.index)
+        child_ids = slice(child_ids.start, child_ids.stop)
+        p[tree.action[child_ids]] = tree.p[child_ids]
+
+        p_noise = p.copy()
+        if node.index in tree.p_noise:
+            p_noise[tree.action[child_ids]] = tree.p_noise[node.index]
+
+        return p.tolist(), p_noise.tolist()
+
     def get_next_states(self, states, action, player, env=None):
         """ スタックに次の状態を追加して、古い状態を切り捨てる """
         x1, x2 = (action // self.CFG.board_width), (action % self.CFG.board_width)
@@ -337,6 +377,8 @@ class Util:
 
     def get_next_node(self, node, action, env=None):
         """ 遷移先のノードを取得する処理 """
+        from .Node import Node
+
         if len(node.child_nodes) > 0:
             """ 子ノードがある場合は行動先に遷移 """
             for child_node in node.child_nodes:
@@ -344,11 +386,17 @@ class Util:
                     next_node = child_node
                     break
 
+            """ 遷移先の局面履歴を確定 """
+            node.tree.get_states(next_node.index, env)
+
         else:
             """ 初回訪問の場合は、今のノードを直接書き換える (プレーヤーを反転)"""
             states = self.get_next_states(node.states, action, -node.player, env)
-            next_node = copy.deepcopy(node)
+            next_node = Node(self.CFG)
             next_node.states = states
+            next_node.actions = node.actions
+            next_node.action = node.action
+            next_node.player = node.player
 
         return next_node
 
@@ -364,8 +412,12 @@ class Util:
         return iteration_counter
 
     def load_dataset(self, self_play):
-        dataset = np.load(self.CFG.dataset_path, allow_pickle=True)
-        self_play.dataset = dataset.tolist()
+        if hasattr(self_play.dataset, 'load'):
+            """ リプレイバッファは pickle を使わずに読み込む """
+            dataset = self_play.dataset.load(self.CFG.dataset_path)
+        else:
+            dataset = np.load(self.CFG.dataset_path, allow_pickle=True)
+            self_play.dataset = dataset.tolist()
         print('Dataset loaded.')
         print('Dataset size:', len(dataset))
 
@@ -0,0 +1,33 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title Zobrist
+
+""" Zobrist """
+import numpy as np
+
+
+class Zobrist():
+    """
+    局面履歴 (node.states) と手番のZobristハッシュ
+    同じseedなら同じ値になるので、別々のインスタンスで作ったキーも比較できる
+    """
+    def __init__(self, CFG, seed=0):
+        self.CFG = CFG
+
+        """ 乱数テーブル: [履歴, 石の色, マス] と手番 """
+        rng = np.random.default_rng(seed)
+        size = (CFG.history_size, 2, CFG.board_width * CFG.board_width)
+        self.table = rng.integers(0, 2**63, size=size, dtype=np.uint64)
+        self.turn = np.uint64(rng.integers(0, 2**63, dtype=np.uint64))
+
+    def __call__(self, states, player):
+        """ 局面履歴と手番のハッシュ値 """
+        states = np.asarray(states).reshape(self.CFG.history_size, -1)
+
+        key = np.bitwise_xor.reduce(self.table[:, 0][states == 1])
+        key ^= np.bitwise_xor.reduce(self.table[:, 1][states == -1])
+
+        if player == -1:
+            key ^= self.turn
+
+        return int(key)
@@ -2,6 +2,23 @@ import sys
 sys.path.append('./')
 
 from .SelfPlay import *
+from .ParallelSelfPlay import *
+from .SelfPlayPool import *
+from .Pipeline import *
+from .Arena import *
+from .ReplayBuffer import *
+from .MemmapDataset import *
+from .BatchLoader import *
+from .DatasetLog import *
+from .InferenceServer import *
+from .Zobrist import *
+from .Symmetry import *
+from .Solver import *
+from .AlphaBeta import *
+from .Accuracy import *
+from .EvaluationCache import *
+from .TranspositionTable import *
+from .Tree import *
 from .Node import *
 from .MCTS import *
 from .Train import *
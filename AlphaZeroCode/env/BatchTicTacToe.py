@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import numpy as np
+
+""" 勝ちの並び (行動インデックス) """
+LINES = np.array([
+    [0, 1, 2], [3, 4, 5], [6, 7, 8], # 横
+    [0, 3, 6], [1, 4, 7], [2, 5, 8], # 縦
+    [0, 4, 8], [2, 4, 6],            # 斜め
+])
+
+
+class BatchTicTacToe():
+    """
+    B局の三目並べをまとめて進める環境
+    盤面は [B, 3, 3] の配列で保持し、step・合法手・終局判定を全局まとめて計算する
+    報酬の定義は TicTacToe と同じ (勝った手番のプレーヤー、引き分けは0)
+    """
+    def __init__(self, batch_size):
+        self.width = 3 #CFG.board_width
+        self.action_size = self.width * self.width
+        self.batch_size = batch_size
+        self.reset()
+
+    def reset(self, indices=None):
+        """ 全局、または指定した局だけを初期化 """
+        if indices is None:
+            self.state = np.zeros((self.batch_size, self.width, self.width), dtype=np.int8)
+            self.player = np.full(self.batch_size, -1, dtype=np.int8)
+            self.done = np.zeros(self.batch_size, dtype=bool)
+            self.reward = np.zeros(self.batch_size, dtype=np.int8)
+        else:
+            self.state[indices] = 0
+            self.player[indices] = -1
+            self.done[indices] = False
+            self.reward[indices] = 0
+
+        return self.state
+
+    def step(self, actions):
+        """
+        各局に1手ずつ打つ。終局済みの局の行動は無視する
+        actions: [B] の行動インデックス
+        """
+        actions = np.asarray(actions)
+        active = np.nonzero(~self.done)[0]
+        player = self.player[active]
+
+        board = self.state.reshape(self.batch_size, -1)
+        board[active, actions[active]] = player
+
+        """ 今打ったプレーヤーの石が並んだか """
+        lines = board[active][:, LINES].sum(axis=2) # [B, 8]
+        win = (lines == 3 * player[:, None]).any(axis=1)
+        draw = ~win & (board[active] != 0).all(axis=1)
+
+        self.done[active] = win | draw
+        self.reward[active] = np.where(win, player, 0)
+        self.player[active] = -player
+
+        return self.state, self.reward, self.done
+
+    def legal_mask(self):
+        """ [B, 9] の合法手マスク (終局済みの局はすべてFalse) """
+        board = self.state.reshape(self.batch_size, -1)
+        return (board == 0) & ~self.done[:, None]
+
+    def get_legal_actions(self, i):
+        """ i局目の合法手 (TicTacToe.get_legal_actionsと同じ形式) """
+        return np.where(self.state[i].reshape(-1) == 0)[0]
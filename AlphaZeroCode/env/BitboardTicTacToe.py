@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import numpy as np
+from .Env import Env
+
+""" 勝ちの並び (ビット番号 = 行動インデックス) """
+LINES = [
+    0b000000111, 0b000111000, 0b111000000, # 横
+    0b001001001, 0b010010010, 0b100100100, # 縦
+    0b100010001, 0b001010100,              # 斜め
+]
+FULL = 0b111111111
+
+""" 9ビットの盤面すべてについて、勝ち判定と合法手を事前に計算 """
+WIN_TABLE = [any(mask & line == line for line in LINES) for mask in range(FULL + 1)]
+LEGAL_TABLE = []
+for mask in range(FULL + 1):
+    legal_actions = np.array([a for a in range(9) if not mask >> a & 1], dtype=np.int64)
+    legal_actions.setflags(write=False)
+    LEGAL_TABLE.append(legal_actions)
+
+
+class BitboardTicTacToe(Env):
+    """
+    ビットボード版の三目並べ。TicTacToe と同じインターフェース
+    先手(-1)と後手(1)の石を2つの整数のビットマスクで保持する
+    state (二次元リスト) は互換性のために石を置くたびに同期する
+    """
+    def __init__(self):
+        self.width = 3 #CFG.board_width
+        self.action_size = self.width * self.width
+        self.reset()
+
+    def reset(self):
+        self.masks = {-1: 0, 1: 0}
+        self._state = [[0 for x in range(0, self.width)] for y in range(0, self.width)]
+        self.done = False
+        self.player = -1
+        self.reward = 0
+        self.undo_stack = []
+        return self._state
+
+    @property
+    def state(self):
+        return self._state
+
+    @state.setter
+    def state(self, state):
+        """ 二次元リストからビットマスクを作成 """
+        self._state = state
+        self.masks = {-1: 0, 1: 0}
+        for a in range(self.action_size):
+            piece = state[a // self.width][a % self.width]
+            if piece != 0:
+                self.masks[piece] |= 1 << a
+
+    def step(self, a):
+        mask = self.masks[self.player] | 1 << a
+        self.masks[self.player] = mask
+        self._state[a // self.width][a % self.width] = self.player
+
+        if WIN_TABLE[mask]:
+            self.done = True
+            self.reward = self.player
+
+        elif mask | self.masks[-self.player] == FULL:
+            self.done = True
+            self.reward = 0
+
+        self.player = -self.player
+        return self._state, self.reward, self.done
+
+    def push(self, a):
+        """ 取り消し可能な step (MCTS用) """
+        self.undo_stack.append((a, self.done, self.reward))
+        return self.step(a)
+
+    def pop(self):
+        """ 直前の push を取り消す """
+        a, self.done, self.reward = self.undo_stack.pop()
+        self.player = -self.player
+        self.masks[self.player] &= ~(1 << a)
+        self._state[a // self.width][a % self.width] = 0
+
+    def get_legal_actions(self, state=None):
+        """ 空きマス = 両者のマスクの補集合 """
+        if state is None:
+            return LEGAL_TABLE[self.masks[-1] | self.masks[1]]
+
+        occupied = 0
+        for a, piece in enumerate(np.array(state).reshape(-1)):
+            if piece != 0:
+                occupied |= 1 << a
+
+        return LEGAL_TABLE[occupied]
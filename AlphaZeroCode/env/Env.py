@@ -0,0 +1,27 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import copy
+
+class Env():
+    """
+    環境のプロトコル (MCTS, Agent, Evaluate から利用するメソッド)
+
+    reset()                      -> state
+    step(action)                 -> state, reward, done
+    get_legal_actions(state=None)-> 合法手 (stateを省略した場合は現在の局面)
+    push(action)                 -> state, reward, done  取り消し可能な step
+    pop()                        -> 直前の push を取り消す
+
+    MCTSは push/pop を持つ環境では、1つの環境を進めて戻すだけで探索する。
+    ここでの push/pop は局面を保存する汎用の実装なので、
+    新しいゲームでは差分だけを戻す実装に置き換えること。
+    """
+    def push(self, action):
+        if not hasattr(self, 'undo_stack'):
+            self.undo_stack = []
+
+        self.undo_stack.append((copy.deepcopy(self.state), self.player, self.done, self.reward))
+        return self.step(action)
+
+    def pop(self):
+        self.state, self.player, self.done, self.reward = self.undo_stack.pop()
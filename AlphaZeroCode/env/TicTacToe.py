@@ -1,8 +1,9 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 import numpy as np
+from .Env import Env
 
-class TicTacToe():
+class TicTacToe(Env):
     def __init__(self):
         self.width = 3 #CFG.board_width
         self.action_size = self.width * self.width
@@ -13,6 +14,7 @@ class TicTacToe():
         self.done = False
         self.player = -1
         self.reward = 0
+        self.undo_stack = []
         return self.state
 
     def step(self, a):
@@ -33,7 +35,21 @@ class TicTacToe():
         self.player = -self.player
         return self.state, self.reward, self.done
 
-    def get_legal_actions(self, state):
+    def push(self, a):
+        """ 取り消し可能な step (MCTS用) """
+        self.undo_stack.append((a, self.done, self.reward))
+        return self.step(a)
+
+    def pop(self):
+        """ 直前の push を取り消す """
+        a, self.done, self.reward = self.undo_stack.pop()
+        x1, x2 = (a // self.width), (a % self.width)
+        self.state[x1][x2] = 0
+        self.player = -self.player
+
+    def get_legal_actions(self, state=None):
+        if state is None:
+            state = self.state # MCTSからは現在の局面で呼ばれる
         state = np.array(state, dtype=np.float32).reshape(-1)
         return np.where(state==0)[0]
 
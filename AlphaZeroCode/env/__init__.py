@@ -1,4 +1,7 @@
 import sys
 sys.path.append('../')
 
+from .Env import *
 from .TicTacToe import *
+from .BitboardTicTacToe import *
+from .BatchTicTacToe import *
@@ -6,6 +6,7 @@
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
+from .FusedAlphaZeroNetwork import FusedAlphaZeroNetwork
 
 class Resnet(nn.Module):
 
@@ -114,12 +115,15 @@ class AlphaZeroNetwork(nn.Module):
         x = self.bn1(x)
         x = F.relu(x, inplace=True)
 
-        """ Residual blocks """
-        for i in range(self.CFG.n_residual_block):
-            x = self.resnet(x)
+        """ Residual blocks (self.resnet は全ブロックの nn.Sequential なので1回だけ呼ぶ) """
+        x = self.resnet(x)
 
         return x
 
+    def fuse(self):
+        """ BatchNorm を畳み込んだ推論専用のモデル (FusedAlphaZeroNetwork) を作成 """
+        return FusedAlphaZeroNetwork(self)
+
     def policy_head(self, x):
         """
         Architecture
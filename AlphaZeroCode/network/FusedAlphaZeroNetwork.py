@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title FusedAlphaZeroNetwork
+
+""" Import PyTorch framework """
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+
+def fuse_conv_bn(conv, bn):
+    """ 畳み込みの直後の BatchNorm (推論時の統計量) を、畳み込みの重みとバイアスに畳み込む """
+    scale = bn.weight / torch.sqrt(bn.running_var + bn.eps)
+
+    fused = nn.Conv2d(conv.in_channels, conv.out_channels, kernel_size=conv.kernel_size,
+                      stride=conv.stride, padding=conv.padding, bias=True)
+
+    bias = conv.bias if conv.bias is not None else torch.zeros_like(bn.running_mean)
+    fused.weight.copy_(conv.weight * scale.reshape(-1, 1, 1, 1))
+    fused.bias.copy_((bias - bn.running_mean) * scale + bn.bias)
+
+    return fused.to(conv.weight.device)
+
+
+class FusedAlphaZeroNetwork(nn.Module):
+    """
+    AlphaZeroNetwork の推論専用版 (学習はできない)
+    BatchNorm を畳み込みに畳み込み、torch.inference_mode と channels_last で推論する
+    元のモデルの重みのコピーなので、学習で重みが変わったら作り直す (AlphaZeroNetwork.fuse)
+    """
+    def __init__(self, model):
+        super().__init__()
+
+        with torch.no_grad():
+            self.conv1 = fuse_conv_bn(model.conv1, model.bn1)
+            self.resnet = nn.ModuleList([
+                nn.ModuleList([fuse_conv_bn(block.conv1, block.batchnorm1),
+                               fuse_conv_bn(block.conv2, block.batchnorm2)])
+                for block in model.resnet])
+
+            self.conv_policy1 = fuse_conv_bn(model.conv_policy1, model.bn_policy1)
+            self.conv_policy2 = fuse_conv_bn(model.conv_policy2, model.bn_policy2)
+            self.conv_value = fuse_conv_bn(model.conv_value, model.bn_value)
+            self.fc_value1 = nn.Linear(model.fc_value1.in_features, model.fc_value1.out_features)
+            self.fc_value2 = nn.Linear(model.fc_value2.in_features, model.fc_value2.out_features)
+            self.fc_value1.load_state_dict(model.fc_value1.state_dict())
+            self.fc_value2.load_state_dict(model.fc_value2.state_dict())
+
+        self.to(model.conv1.weight.device, memory_format=torch.channels_last)
+        self.eval()
+        self.requires_grad_(False)
+
+    @torch.inference_mode()
+    def forward(self, x):
+        x = x.contiguous(memory_format=torch.channels_last)
+
+        """ Body """
+        x = F.relu(self.conv1(x), inplace=True)
+
+        for conv1, conv2 in self.resnet:
+            x = F.relu(x + conv2(F.relu(conv1(x), inplace=True)), inplace=True)
+
+        """ Policy """
+        p = F.relu(self.conv_policy1(x), inplace=True)
+        p = F.relu(self.conv_policy2(p), inplace=True)
+        p = F.softmax(torch.flatten(p, start_dim=1), dim=1)
+
+        """ State value """
+        v = F.relu(self.conv_value(x))
+        v = F.relu(self.fc_value1(torch.flatten(v, start_dim=1)), inplace=True)
+        v = torch.tanh(self.fc_value2(v))
+
+        return p, v
@@ -2,4 +2,5 @@ import sys
 sys.path.append('../')
 
 from .AlphaZeroNetwork import *
+from .FusedAlphaZeroNetwork import *
 from .SimpleNet import *
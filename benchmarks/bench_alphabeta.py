@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title bench_alphabeta
+"""
+アルファベータ探索 (AlphaBeta) の探索ノード数と nodes/sec
+1手進めた局面で、環境をコピーする Minimax プレーヤーと1手あたりの時間を比較し、
+初期局面からの自己対戦1局で置換表を手番をまたいで再利用した効果を見る
+
+Usage:
+python benchmarks/bench_alphabeta.py
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from AlphaZeroCode.Agent import Agent
+from AlphaZeroCode.AlphaBeta import AlphaBeta
+from AlphaZeroCode.env.BitboardTicTacToe import BitboardTicTacToe
+from AlphaZeroCode.network.AlphaZeroNetwork import AlphaZeroNetwork
+
+
+class CFG:
+    board_width = 3
+    action_size = 9
+    history_size = 1
+    first_player = -1
+    second_player = 1
+    num_simulation = 100
+    cpuct = 1.25
+    Dirichlet_alpha = 0.3
+    Dirichlet_epsilon = 0.25
+    tau = 1.0
+    tau_limit = 3
+    resnet_channels = 8
+    n_residual_block = 1
+    hidden_size = 16
+    device = 'cpu'
+
+
+def main():
+    env = BitboardTicTacToe()
+    env.step(4)
+    agent = Agent(env, AlphaZeroNetwork(CFG), CFG)
+
+    start = time.perf_counter()
+    agent.player_minimax(env, env.player)
+    minimax = time.perf_counter() - start
+
+    start = time.perf_counter()
+    agent.player_alphabeta(env, env.player)
+    alphabeta = time.perf_counter() - start
+    agent.alphabeta.show_stats()
+
+    print('minimax  : {:.3f} s/move'.format(minimax))
+    print('alphabeta: {:.3f} s/move  x{:,.0f}'.format(alphabeta, minimax / alphabeta))
+    print()
+
+    """ 初期局面から1局 """
+    env.reset()
+    engine = AlphaBeta(CFG)
+    while not env.done:
+        action = engine(env)
+        engine.show_stats()
+        env.step(action)
+    print('reward', env.reward)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title bench_arena
+"""
+Arena の対局スループット: 1局ずつ逐次探索 (play_AZ_vs_AZ 相当) と、複数局を同時に進めるバッチ推論の比較
+SPRT が決着した場合はその時点までの対局数で計測する
+
+Usage:
+python benchmarks/bench_arena.py
+"""
+import os
+import sys
+import torch
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from AlphaZeroCode.Arena import Arena
+from AlphaZeroCode.env.BitboardTicTacToe import BitboardTicTacToe
+from AlphaZeroCode.network.AlphaZeroNetwork import AlphaZeroNetwork
+
+
+class CFG:
+    board_width = 3
+    action_size = 9
+    history_size = 1
+    first_player = -1
+    second_player = 1
+    num_simulation = 100
+    cpuct = 1.25
+    Dirichlet_alpha = 0.3
+    Dirichlet_epsilon = 0.25
+    tau = 1.0
+    tau_limit = 3
+    resnet_channels = 32
+    n_residual_block = 3
+    hidden_size = 64
+    device = 'cpu'
+    seed = 0
+
+
+def main(max_game=32):
+    torch.manual_seed(0)
+    env = BitboardTicTacToe()
+    model1 = AlphaZeroNetwork(CFG)
+    model2 = AlphaZeroNetwork(CFG)
+
+    rates = []
+    for num_game, search_batch_size in [(1, 1), (16, 8)]:
+        CFG.search_batch_size = search_batch_size
+        arena = Arena(CFG, env, model1, model2, num_game=num_game)
+        result = arena(max_game)
+        arena.show_result(result)
+        rates.append(result['games'] / result['time'])
+
+    print('sequential: {:>6.2f} games/sec'.format(rates[0]))
+    print('batched   : {:>6.2f} games/sec  x{:.1f}'.format(rates[1], rates[1] / rates[0]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title bench_batch_loader
+"""
+ミニバッチの組み立て速度 (batches/sec)
+従来: Util.make_batch (入れ子のリストから torch.FloatTensor)
+BatchLoader: 連続した配列から再利用するテンソルに番号で集める (リスト / ReplayBuffer、先読みあり / なし)
+
+Usage:
+python benchmarks/bench_batch_loader.py
+"""
+import os
+import sys
+import time
+import random
+import numpy as np
+import torch
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from AlphaZeroCode.Util import Util
+from AlphaZeroCode.BatchLoader import BatchLoader
+from AlphaZeroCode.ReplayBuffer import ReplayBuffer
+
+
+class CFG:
+    board_width = 9
+    action_size = 81
+    history_size = 8
+    batch_size = 256
+    max_dataset_size = 20000
+    device = 'cpu'
+
+
+def make_rows(num_row, seed=0):
+    """ SelfPlay.backup と同じ形式 [input_features, pi, [z], plain] のダミーデータ """
+    rng = np.random.default_rng(seed)
+    C, W = CFG.history_size * 2 + 1, CFG.board_width
+    rows = []
+
+    for _ in range(num_row):
+        features = (rng.random((C, W, W)) < 0.3).astype(np.float32).tolist()
+        pi = rng.dirichlet([0.3] * CFG.action_size).tolist()
+        rows.append([features, pi, [int(rng.integers(-1, 2))], {}])
+
+    return rows
+
+
+def batches_per_sec(batches):
+    start = time.perf_counter()
+    count = sum(1 for _ in batches)
+    return count / (time.perf_counter() - start)
+
+
+def main(num_row=20000):
+    rows = make_rows(num_row)
+    util = Util(CFG)
+
+    def make_batch():
+        dataset = random.sample(rows, len(rows))
+        for i in range(0, len(dataset), CFG.batch_size):
+            yield util.make_batch(dataset[i:i + CFG.batch_size])
+
+    before = batches_per_sec(make_batch())
+    print('Util.make_batch           : {:>8.1f} batches/s'.format(before))
+
+    start = time.perf_counter()
+    loader = BatchLoader(CFG, rows)
+    print('BatchLoader(list) convert : {:>8.2f}s (once per Train call)'.format(time.perf_counter() - start))
+
+    buffer = ReplayBuffer(CFG).extend(rows)
+
+    for name, dataset in [('list', rows), ('ReplayBuffer', buffer)]:
+        for prefetch in [0, 2]:
+            after = batches_per_sec(BatchLoader(CFG, dataset, prefetch=prefetch))
+            print('BatchLoader({}, prefetch={}){}: {:>8.1f} batches/s  x{:.1f}'
+                  .format(name, prefetch, ' ' * (12 - len(name)), after, after / before))
+
+
+if __name__ == '__main__':
+    torch.set_num_threads(1)
+    main()
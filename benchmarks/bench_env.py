@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title bench_env
+"""
+環境のベンチマーク (ランダム対局での1秒あたりのstep数)
+TicTacToe (二次元リスト) と BitboardTicTacToe (ビットボード) を比較
+BatchTicTacToe は全局の合計step数
+
+Usage:
+python benchmarks/bench_env.py
+"""
+import os
+import sys
+import time
+import random
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from AlphaZeroCode.env.TicTacToe import TicTacToe
+from AlphaZeroCode.env.BitboardTicTacToe import BitboardTicTacToe
+from AlphaZeroCode.env.BatchTicTacToe import BatchTicTacToe
+
+
+def measure(env, seconds=2.0):
+    """ 合法手の取得 + step をゲーム終了まで繰り返す """
+    rng = random.Random(0)
+    num_step = 0
+    start = time.perf_counter()
+
+    while time.perf_counter() - start < seconds:
+        env.reset()
+        done = False
+        while not done:
+            action = rng.choice(env.get_legal_actions())
+            _, _, done = env.step(action)
+            num_step += 1
+
+    return num_step / (time.perf_counter() - start)
+
+
+def measure_batch(env, seconds=2.0):
+    """ 全局が終局するまで、合法手からランダムに選んで一斉にstep """
+    rng = np.random.default_rng(0)
+    num_step = 0
+    start = time.perf_counter()
+
+    while time.perf_counter() - start < seconds:
+        env.reset()
+        while not env.done.all():
+            mask = env.legal_mask()
+            num_step += int((~env.done).sum())
+            actions = (rng.random(mask.shape) * mask).argmax(axis=1)
+            env.step(actions)
+
+    return num_step / (time.perf_counter() - start)
+
+
+def main():
+    before = measure(TicTacToe())
+    after = measure(BitboardTicTacToe())
+
+    print('TicTacToe         : {:>10,.0f} steps/s'.format(before))
+    print('BitboardTicTacToe : {:>10,.0f} steps/s  x{:.1f}'.format(after, after / before))
+
+    for batch_size in [64, 256, 1024]:
+        batch = measure_batch(BatchTicTacToe(batch_size))
+        print('BatchTicTacToe({:>4}): {:>10,.0f} steps/s  x{:.1f}'.format(batch_size, batch, batch / before))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title bench_evaluation_cache
+"""
+推論キャッシュ (EvaluationCache) のヒット率と自己対局のスループット
+TicTacToe は局面数が少ないので、数局でヒット率がほぼ100%に近づく
+
+Usage:
+python benchmarks/bench_evaluation_cache.py
+"""
+import os
+import sys
+import time
+import torch
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from AlphaZeroCode.SelfPlay import SelfPlay
+from AlphaZeroCode.env.BitboardTicTacToe import BitboardTicTacToe
+from AlphaZeroCode.network.AlphaZeroNetwork import AlphaZeroNetwork
+
+
+class CFG:
+    board_width = 3
+    action_size = 9
+    history_size = 1
+    first_player = -1
+    second_player = 1
+    num_simulation = 100
+    cpuct = 1.25
+    Dirichlet_alpha = 0.3
+    Dirichlet_epsilon = 0.25
+    tau = 1.0
+    tau_limit = 3
+    resnet_channels = 32
+    n_residual_block = 3
+    hidden_size = 64
+    max_dataset_size = 100000
+    device = 'cpu'
+    seed = 0
+
+
+def games_per_hour(self_play, num_game):
+    start = time.perf_counter()
+    for _ in range(num_game):
+        self_play()
+    return num_game * 3600 / (time.perf_counter() - start)
+
+
+def main(num_game=20):
+    torch.manual_seed(0)
+    env = BitboardTicTacToe()
+    model = AlphaZeroNetwork(CFG)
+
+    before = games_per_hour(SelfPlay(CFG, env, model), num_game)
+    print()
+
+    CFG.evaluation_cache_mb = 16
+    self_play = SelfPlay(CFG, env, model)
+    after = games_per_hour(self_play, num_game)
+    print()
+
+    self_play.agent.mcts.cache.show_stats()
+    print('no cache: {:>8,.0f} games/hour'.format(before))
+    print('cache   : {:>8,.0f} games/hour  x{:.1f}'.format(after, after / before))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title bench_inference_server
+"""
+推論サーバーの動的バッチの確認
+複数のアクター (スレッド / プロセス) がそれぞれMCTSで探索し、推論はサーバーにまとめる
+
+Usage:
+python benchmarks/bench_inference_server.py
+"""
+import os
+import sys
+import time
+import threading
+import torch
+import torch.multiprocessing as mp
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from AlphaZeroCode.Agent import Agent
+from AlphaZeroCode.Node import Node
+from AlphaZeroCode.InferenceServer import InferenceServer
+from AlphaZeroCode.env.BitboardTicTacToe import BitboardTicTacToe
+from AlphaZeroCode.network.AlphaZeroNetwork import AlphaZeroNetwork
+
+
+class CFG:
+    board_width = 3
+    action_size = 9
+    history_size = 1
+    first_player = -1
+    second_player = 1
+    num_simulation = 100
+    cpuct = 1.25
+    Dirichlet_alpha = 0.3
+    Dirichlet_epsilon = 0.25
+    tau = 1.0
+    tau_limit = 3
+    resnet_channels = 32
+    n_residual_block = 3
+    hidden_size = 64
+    device = 'cpu'
+    inference_max_batch_size = 16
+    inference_max_wait = 0.002
+
+
+def actor(client, num_search):
+    """ 初期局面からの探索を繰り返す """
+    torch.set_num_threads(1)
+    env = BitboardTicTacToe()
+    agent = Agent(env, client, CFG)
+
+    for _ in range(num_search):
+        agent.alpha_zero(Node(CFG, env.reset()))
+
+
+def run(num_actor, process, num_search=4):
+    model = AlphaZeroNetwork(CFG)
+
+    with InferenceServer(model, CFG, num_client=num_actor, process=process) as server:
+        Worker = mp.get_context('fork').Process if process else threading.Thread
+        actors = [Worker(target=actor, args=(client, num_search)) for client in server.clients]
+
+        start = time.perf_counter()
+        for worker in actors:
+            worker.start()
+        for worker in actors:
+            worker.join()
+        elapsed = time.perf_counter() - start
+
+        print('{} actors ({}): {:.0f} simulations/s'
+              .format(num_actor, 'process' if process else 'thread',
+                      num_actor * num_search * CFG.num_simulation / elapsed))
+        server.show_stats()
+        print()
+
+
+if __name__ == '__main__':
+    run(8, process=False)
+    run(4, process=True)
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title bench_memmap_dataset
+"""
+メモリマップしたデータセットの、開くまでの時間とランダムなミニバッチの取り出し速度
+(データ全体をRAMに読み込まない)
+
+Usage:
+python benchmarks/bench_memmap_dataset.py
+"""
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from AlphaZeroCode.MemmapDataset import MemmapDataset
+
+
+class CFG:
+    board_width = 9
+    action_size = 81
+    history_size = 8
+    batch_size = 256
+
+
+def fill(dataset, num_sample, chunk=10000, seed=0):
+    """ ダミーデータをまとめて書き込む (ReplayBuffer.append と同じ配置) """
+    rng = np.random.default_rng(seed)
+    shape = (CFG.history_size * 2 + 1, CFG.board_width, CFG.board_width)
+    dataset.allocate(shape)
+
+    for start in range(0, num_sample, chunk):
+        end = min(start + chunk, num_sample)
+        features = rng.random((end - start, int(np.prod(shape)))) < 0.3
+        dataset.planes[start:end] = np.packbits(features, axis=1)
+        dataset.pi[start:end] = rng.dirichlet([0.3] * CFG.action_size, size=end - start)
+        dataset.z[start:end] = rng.integers(-1, 2, size=end - start)
+
+    dataset.head = num_sample % dataset.capacity
+    dataset.size = num_sample
+    dataset.flush()
+
+
+def main(num_sample=1000000, num_batch=200):
+    path = os.path.join(tempfile.mkdtemp(), 'dataset')
+    fill(MemmapDataset(CFG, path, capacity=num_sample), num_sample)
+
+    start = time.perf_counter()
+    dataset = MemmapDataset(CFG, path, mode='r')
+    open_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(num_batch):
+        features, pi, z = dataset.sample(CFG.batch_size)
+    sample_time = time.perf_counter() - start
+
+    size = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    print('samples: {:,}  file: {:.0f} MB  open: {:.4f}s'.format(num_sample, size / 2**20, open_time))
+    print('random minibatches ({}): {:.0f} batches/s'.format(CFG.batch_size, num_batch / sample_time))
+
+
+if __name__ == '__main__':
+    main()
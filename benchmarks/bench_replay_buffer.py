@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title bench_replay_buffer
+"""
+経験データの保存形式の比較: pickle したオブジェクトのリスト (Util.save_dataset) と ReplayBuffer
+メモリ使用量、ファイルサイズ、保存と読み込みの時間
+
+Usage:
+python benchmarks/bench_replay_buffer.py
+"""
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from AlphaZeroCode.ReplayBuffer import ReplayBuffer
+
+
+class CFG:
+    board_width = 9
+    action_size = 81
+    history_size = 8
+    max_dataset_size = 20000
+
+
+def make_rows(num_row, seed=0):
+    """ SelfPlay.backup と同じ形式 [input_features, pi, [z], plain] のダミーデータ """
+    rng = np.random.default_rng(seed)
+    C, W = CFG.history_size * 2 + 1, CFG.board_width
+    rows = []
+
+    for _ in range(num_row):
+        features = (rng.random((C, W, W)) < 0.3).astype(np.float32).tolist()
+        pi = rng.dirichlet([0.3] * CFG.action_size).tolist()
+        rows.append([features, pi, [int(rng.integers(-1, 2))], {}])
+
+    return rows
+
+
+def timed(f):
+    start = time.perf_counter()
+    result = f()
+    return result, time.perf_counter() - start
+
+
+def main(num_row=20000):
+    rows = make_rows(num_row)
+    directory = tempfile.mkdtemp()
+
+    """ pickle したオブジェクトのリスト """
+    path = os.path.join(directory, 'dataset.npy')
+    _, save_time = timed(lambda: np.save(path, np.array(rows, dtype=object)))
+    _, load_time = timed(lambda: np.load(path, allow_pickle=True).tolist())
+    print('object list : file {:>8.1f} MB  save {:.2f}s  load {:.2f}s'
+          .format(os.path.getsize(path) / 2**20, save_time, load_time))
+
+    """ ReplayBuffer """
+    buffer, append_time = timed(lambda: ReplayBuffer(CFG).extend(rows))
+    path = os.path.join(directory, 'dataset.npz')
+    _, save_time = timed(lambda: buffer.save(path))
+    _, load_time = timed(lambda: ReplayBuffer(CFG).load(path))
+    print('ReplayBuffer: file {:>8.1f} MB  save {:.2f}s  load {:.2f}s  memory {:.1f} MB  append {:.1f} us/row'
+          .format(os.path.getsize(path) / 2**20, save_time, load_time, buffer.nbytes / 2**20,
+                  append_time / num_row * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title bench_select
+"""
+MCTS.select のマイクロベンチマーク (1秒あたりの選択回数)
+before: 子ノードごとにエッジを複製してPythonループでPUCTを計算する従来の実装
+after : 探索木の配列に対する一括計算 (MCTS.select)
+
+Usage:
+python benchmarks/bench_select.py
+"""
+import os
+import sys
+import copy
+import time
+from math import sqrt
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from AlphaZeroCode.MCTS import MCTS
+from AlphaZeroCode.Node import Node
+
+
+def make_CFG(board_width):
+    class CFG:
+        pass
+
+    CFG.board_width = board_width
+    CFG.action_size = board_width * board_width
+    CFG.history_size = 1
+    CFG.first_player = -1
+    CFG.second_player = 1
+    CFG.num_simulation = 800
+    CFG.cpuct = 1.25
+    CFG.Dirichlet_alpha = 0.3
+    CFG.Dirichlet_epsilon = 0.25
+    CFG.device = 'cpu'
+    return CFG
+
+
+class Edge:
+    """ 従来のNode相当 (計測用) """
+    def __init__(self):
+        self.child_nodes = []
+        self.action = None
+        self.n = 0
+        self.w = 0
+        self.p = 0
+        self.Q = 0
+
+
+def legacy_select(node, cpuct):
+    """ 従来の選択処理: エッジの複製 + Pythonループ """
+    child_nodes = []
+    for child_node in node.child_nodes:
+        edge = copy.copy(node)
+        edge.p = copy.copy(child_node.p)
+        edge.w = child_node.w
+        edge.Q = child_node.Q
+        edge.n = child_node.n
+        edge.action = child_node.action
+        child_nodes.append(edge)
+
+    pucts = []
+    s = node.n - 1
+    for child_node in child_nodes:
+        U = cpuct * child_node.p * sqrt(s) / (1 + child_node.n)
+        pucts.append(child_node.Q + U)
+
+    return node.child_nodes[np.argmax(pucts)]
+
+
+def make_position(CFG, rng):
+    """ 訪問回数と事前確率を乱数で埋めたルートを作成 """
+    p = rng.dirichlet([1.0] * CFG.action_size).astype(np.float32)
+    n = rng.integers(0, 50, CFG.action_size)
+    Q = rng.uniform(-1, 1, CFG.action_size).astype(np.float32)
+
+    """ 従来の表現 """
+    legacy = Edge()
+    for a in range(CFG.action_size):
+        child = Edge()
+        child.action, child.p, child.n, child.Q = a, float(p[a]), int(n[a]), float(Q[a])
+        child.w = child.Q * child.n
+        legacy.child_nodes.append(child)
+    legacy.n = int(n.sum()) + 1
+
+    """ 配列の表現 """
+    node = Node(CFG)
+    tree = node.tree
+    tree.add_child_nodes(node.index, np.arange(CFG.action_size), p, -node.player)
+    offset = tree.child_offset[node.index]
+    tree.n[offset:offset + CFG.action_size] = n
+    tree.Q[offset:offset + CFG.action_size] = Q
+    tree.n[node.index] = legacy.n
+
+    return legacy, node
+
+
+def measure(fn, seconds=1.0):
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        for _ in range(100):
+            fn()
+        count += 100
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    rng = np.random.default_rng(0)
+
+    for board_width in [3, 9, 19]:
+        CFG = make_CFG(board_width)
+        legacy, node = make_position(CFG, rng)
+
+        mcts = MCTS(None, None, CFG)
+        mcts.tree = node.tree
+        mcts.root = -1 # ルート以外の選択を計測 (ノイズなし)
+
+        before = measure(lambda: legacy_select(legacy, CFG.cpuct))
+        after = measure(lambda: mcts.select(node.index))
+
+        print('{0}x{0} ({1} children)  before: {2:>10,.0f} sel/s  after: {3:>10,.0f} sel/s  x{4:.1f}'
+              .format(board_width, CFG.action_size, before, after, after / before))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title bench_selfplay
+"""
+自己対局のスループット (games/hour)
+SelfPlay (1局ずつ) と ParallelSelfPlay (G局の推論をまとめる) を比較
+
+Usage:
+python benchmarks/bench_selfplay.py
+"""
+import os
+import sys
+import time
+import torch
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from AlphaZeroCode.SelfPlay import SelfPlay
+from AlphaZeroCode.ParallelSelfPlay import ParallelSelfPlay
+from AlphaZeroCode.env.BitboardTicTacToe import BitboardTicTacToe
+from AlphaZeroCode.network.AlphaZeroNetwork import AlphaZeroNetwork
+
+
+class CFG:
+    board_width = 3
+    action_size = 9
+    history_size = 1
+    first_player = -1
+    second_player = 1
+    num_simulation = 100
+    cpuct = 1.25
+    Dirichlet_alpha = 0.3
+    Dirichlet_epsilon = 0.25
+    tau = 1.0
+    tau_limit = 3
+    resnet_channels = 32
+    n_residual_block = 3
+    hidden_size = 64
+    max_dataset_size = 100000
+    device = 'cpu'
+    seed = 0
+
+
+def games_per_hour(self_play, num_game):
+    start = time.perf_counter()
+    self_play()
+    return num_game * 3600 / (time.perf_counter() - start)
+
+
+def main(num_game=16):
+    torch.manual_seed(0)
+    env = BitboardTicTacToe()
+    model = AlphaZeroNetwork(CFG)
+
+    def sequential():
+        self_play = SelfPlay(CFG, env, model)
+        for _ in range(num_game):
+            self_play()
+
+    before = games_per_hour(sequential, num_game)
+    print()
+
+    for num_parallel_game in [4, 16]:
+        after = games_per_hour(ParallelSelfPlay(CFG, env, model, num_parallel_game), num_parallel_game)
+        print()
+        print('ParallelSelfPlay({:>2}): {:>8,.0f} games/hour  x{:.1f}'.format(num_parallel_game, after, after / before))
+
+    print('SelfPlay           : {:>8,.0f} games/hour'.format(before))
+
+
+if __name__ == '__main__':
+    main()
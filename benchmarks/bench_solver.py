@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title bench_solver
+"""
+完全解析表 (Solver) の作成・読み込みと、1手あたりの時間を Minimax / Alpha-beta プレーヤーと比較
+Minimax は初期局面からだと時間がかかるので、2手進めた局面で計測する
+
+Usage:
+python benchmarks/bench_solver.py
+"""
+import os
+import sys
+import time
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from AlphaZeroCode.Agent import Agent
+from AlphaZeroCode.Solver import Solver
+from AlphaZeroCode.env.TicTacToe import TicTacToe
+from AlphaZeroCode.network.AlphaZeroNetwork import AlphaZeroNetwork
+
+
+class CFG:
+    board_width = 3
+    action_size = 9
+    history_size = 1
+    first_player = -1
+    second_player = 1
+    num_simulation = 100
+    cpuct = 1.25
+    Dirichlet_alpha = 0.3
+    Dirichlet_epsilon = 0.25
+    tau = 1.0
+    tau_limit = 3
+    resnet_channels = 8
+    n_residual_block = 1
+    hidden_size = 16
+    device = 'cpu'
+    solver_path = os.path.join(tempfile.mkdtemp(), 'solver_3x3.npz')
+
+
+def seconds_per_move(player, env, num_move):
+    start = time.perf_counter()
+    for _ in range(num_move):
+        player(env, env.player)
+    return (time.perf_counter() - start) / num_move
+
+
+def main():
+    start = time.perf_counter()
+    solver = Solver(CFG)
+    solver.table()
+    print('solve: {:.3f}s  positions: {}'.format(time.perf_counter() - start, len(solver.positions())))
+
+    start = time.perf_counter()
+    Solver(CFG).table()
+    print('load : {:.3f}s  ({:,} bytes)'.format(time.perf_counter() - start, os.path.getsize(CFG.solver_path)))
+
+    env = TicTacToe()
+    env.step(4)
+    env.step(0)
+    agent = Agent(env, AlphaZeroNetwork(CFG), CFG)
+
+    results = [
+        ('minimax', seconds_per_move(agent.player_minimax, env, 1)),
+        ('alphabeta', seconds_per_move(agent.player_alphabeta, env, 1)),
+        ('perfect', seconds_per_move(agent.player_perfect, env, 1000)),
+    ]
+    for name, seconds in results:
+        print('{:<10}: {:>12.6f} s/move  x{:,.0f}'.format(name, seconds, results[0][1] / seconds))
+
+
+if __name__ == '__main__':
+    main()
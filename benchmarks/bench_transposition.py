@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title bench_transposition
+"""
+トランスポジションテーブル (探索木のDAG化) の有無による、探索木のサイズと強さの比較
+強さ: ランダムに選んだ局面で、完全解析の最善手 (勝敗を悪化させない手) を選んだ割合
+
+Usage:
+python benchmarks/bench_transposition.py
+"""
+import os
+import sys
+import copy
+import random
+import time
+import torch
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from AlphaZeroCode.MCTS import MCTS
+from AlphaZeroCode.Node import Node
+from AlphaZeroCode.env.TicTacToe import TicTacToe
+from AlphaZeroCode.network.AlphaZeroNetwork import AlphaZeroNetwork
+
+
+class CFG:
+    board_width = 3
+    action_size = 9
+    history_size = 1
+    first_player = -1
+    second_player = 1
+    cpuct = 1.25
+    Dirichlet_alpha = 0.3
+    Dirichlet_epsilon = 0.25
+    tau = 1.0
+    tau_limit = 3
+    resnet_channels = 16
+    n_residual_block = 2
+    hidden_size = 32
+    device = 'cpu'
+    seed = 0
+
+
+LINES = [(0, 1, 2), (3, 4, 5), (6, 7, 8), (0, 3, 6), (1, 4, 7), (2, 5, 8), (0, 4, 8), (2, 4, 6)]
+
+
+def solve(board, player, memo):
+    """ 手番側から見た局面の価値 (1: 勝ち, 0: 引き分け, -1: 負け) """
+    if (board, player) in memo:
+        return memo[(board, player)]
+
+    values = []
+    for a in range(9):
+        if board[a] != 0:
+            continue
+        child = board[:a] + (player,) + board[a + 1:]
+        if any(all(child[i] == player for i in line) for line in LINES):
+            values.append(1)
+        elif all(child):
+            values.append(0)
+        else:
+            values.append(-solve(child, -player, memo))
+
+    memo[(board, player)] = max(values)
+    return memo[(board, player)]
+
+
+def best_actions(board, player, memo):
+    """ 局面の価値を保つ手の集合 """
+    value = solve(board, player, memo)
+    actions = set()
+
+    for a in range(9):
+        if board[a] != 0:
+            continue
+        child = board[:a] + (player,) + board[a + 1:]
+        if any(all(child[i] == player for i in line) for line in LINES):
+            child_value = 1
+        elif all(child):
+            child_value = 0
+        else:
+            child_value = -solve(child, -player, memo)
+        if child_value == value:
+            actions.add(a)
+
+    return actions
+
+
+def positions(num_position, seed=0):
+    """ 終局していない局面をランダムな手順で集める """
+    rng = random.Random(seed)
+    found = {}
+
+    while len(found) < num_position:
+        env = TicTacToe()
+        for _ in range(rng.randrange(0, 7)):
+            _, _, done = env.step(rng.choice(list(env.get_legal_actions())))
+            if done:
+                break
+        if not env.done:
+            board = tuple(x for row in env.state for x in row)
+            found[(board, env.player)] = copy.deepcopy(env.state)
+
+    return [(board, player, state) for (board, player), state in found.items()]
+
+
+def measure(model, samples, num_simulation, transposition, memo):
+    cfg = type('CFG', (CFG,), {'num_simulation': num_simulation})
+    if transposition:
+        cfg.transposition_table_mb = 16
+
+    mcts = MCTS(TicTacToe(), model, cfg, train=False)
+    tree_size = 0
+    correct = 0
+    start = time.perf_counter()
+
+    for board, player, state in samples:
+        node = Node(cfg, state)
+        node.player = player
+        next_node = mcts(node)
+
+        tree_size += mcts.tree.size
+        correct += next_node.action in best_actions(board, player, memo)
+
+    elapsed = time.perf_counter() - start
+    return tree_size / len(samples), correct / len(samples), elapsed / len(samples)
+
+
+def main(num_position=100):
+    torch.manual_seed(0)
+    model = AlphaZeroNetwork(CFG)
+    samples = positions(num_position)
+    memo = {}
+
+    print('{:>5}  {:>18}  {:>18}  {:>16}'.format('sims', 'tree size (TT)', 'best move (TT)', 'time/move (TT)'))
+    for num_simulation in [50, 100, 200, 400]:
+        size, accuracy, elapsed = measure(model, samples, num_simulation, False, memo)
+        size_tt, accuracy_tt, elapsed_tt = measure(model, samples, num_simulation, True, memo)
+        print('{:>5}  {:>7.1f} ({:>7.1f})  {:>7.1%} ({:>7.1%})  {:.3f}s ({:.3f}s)'
+              .format(num_simulation, size, size_tt, accuracy, accuracy_tt, elapsed, elapsed_tt))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title bench_tree_reuse
+"""
+探索木の再利用による、1手あたりの実効シミュレーション数の計測
+実効シミュレーション数 = 前の手から引き継いだルートの訪問回数 + 今回のシミュレーション数
+
+Usage:
+python benchmarks/bench_tree_reuse.py
+"""
+import os
+import sys
+import time
+import torch
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from AlphaZeroCode.Agent import Agent
+from AlphaZeroCode.Node import Node
+from AlphaZeroCode.env.TicTacToe import TicTacToe
+from AlphaZeroCode.network.AlphaZeroNetwork import AlphaZeroNetwork
+
+
+class CFG:
+    board_width = 3
+    action_size = 9
+    history_size = 1
+    first_player = -1
+    second_player = 1
+    num_simulation = 200
+    cpuct = 1.25
+    Dirichlet_alpha = 0.3
+    Dirichlet_epsilon = 0.25
+    tau = 1.0
+    tau_limit = 3
+    resnet_channels = 16
+    n_residual_block = 2
+    hidden_size = 32
+    device = 'cpu'
+    seed = 0
+
+
+def main(num_game=5):
+    torch.manual_seed(0)
+    env = TicTacToe()
+    model = AlphaZeroNetwork(CFG)
+    agent = Agent(env, model, CFG, train=True)
+
+    reused = []
+    start = time.perf_counter()
+
+    for _ in range(num_game):
+        state = env.reset()
+        node = Node(CFG, state)
+        play_count = 1
+
+        while True:
+            node = agent.alpha_zero(node, play_count)
+            reused.append(agent.mcts.reused_simulation)
+
+            _, _, done = env.step(node.action)
+            if done:
+                break
+            play_count += 1
+
+    elapsed = time.perf_counter() - start
+    num_move = len(reused)
+    mean_reused = sum(reused) / num_move
+
+    print('moves: {}  time/move: {:.3f}s'.format(num_move, elapsed / num_move))
+    print('simulations/move: {}  reused visits/move: {:.1f}  effective simulations/move: {:.1f}'
+          .format(CFG.num_simulation, mean_reused, CFG.num_simulation + mean_reused))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title check_fused_network
+"""
+推論専用モデル (FusedAlphaZeroNetwork) と元のモデル (eval モード) の推論速度を比較
+出力の一致は tests/test_fused_network.py で確認する
+
+Usage:
+python benchmarks/check_fused_network.py
+"""
+import os
+import sys
+import time
+import torch
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from AlphaZeroCode.network.AlphaZeroNetwork import AlphaZeroNetwork
+
+
+class CFG:
+    board_width = 9
+    action_size = 81
+    history_size = 8
+    resnet_channels = 64
+    n_residual_block = 6
+    hidden_size = 128
+    device = 'cpu'
+
+
+def randomize_batchnorm(model):
+    """ 学習後のように、BatchNorm の統計量とパラメーターを初期値から動かす """
+    with torch.no_grad():
+        for m in model.modules():
+            if isinstance(m, torch.nn.BatchNorm2d):
+                m.running_mean.uniform_(-0.5, 0.5)
+                m.running_var.uniform_(0.5, 2.0)
+                m.weight.uniform_(0.5, 1.5)
+                m.bias.uniform_(-0.2, 0.2)
+
+
+def features(batch_size):
+    in_channels = CFG.history_size * 2 + 1
+    return (torch.rand(batch_size, in_channels, CFG.board_width, CFG.board_width) < 0.3).float()
+
+
+def per_call(f, x, repeat):
+    f(x)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        f(x)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def quadratic_forward(model, x):
+    """ 修正前の body: 全ブロックの nn.Sequential を n_residual_block 回呼んでいた """
+    x = torch.relu(model.bn1(model.conv1(x)))
+    for _ in range(CFG.n_residual_block):
+        x = model.resnet(x)
+    return model.policy_head(x), model.value_head(x)
+
+
+def main():
+    torch.manual_seed(0)
+    model = AlphaZeroNetwork(CFG)
+    randomize_batchnorm(model)
+    model.eval()
+
+    fused = model.fuse()
+
+    """ 推論速度 (ms/回) """
+    with torch.no_grad():
+        for batch_size in [1, 64]:
+            x = features(batch_size)
+            repeat = 50 if batch_size == 1 else 10
+            before = per_call(lambda x: quadratic_forward(model, x), x, repeat)
+            fixed = per_call(model, x, repeat)
+            after = per_call(fused, x, repeat)
+            print('batch {:>2}: quadratic body {:7.2f} ms  fixed body {:7.2f} ms  fused {:7.2f} ms  (x{:.1f} / x{:.1f})'
+                  .format(batch_size, before, fixed, after, before / fixed, fixed / after))
+
+
+if __name__ == '__main__':
+    main()
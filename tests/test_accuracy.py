@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title test_accuracy
+"""
+Accuracy: 完全解析表を作れない盤では、正解付きの局面 (test_set) で精度を測ること
+
+Usage:
+python -m pytest tests
+"""
+import os
+import sys
+import numpy as np
+import pytest
+import torch
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from AlphaZeroCode.Accuracy import Accuracy
+from AlphaZeroCode.Solver import Solver
+from AlphaZeroCode.network.AlphaZeroNetwork import AlphaZeroNetwork
+
+
+class CFG:
+    board_width = 3
+    action_size = 9
+    history_size = 1
+    first_player = -1
+    second_player = 1
+    num_simulation = 8
+    resnet_channels = 8
+    n_residual_block = 1
+    hidden_size = 16
+    device = 'cpu'
+    solver_path = None
+
+
+class CFG5(CFG):
+    board_width = 5
+    action_size = 25
+
+
+def test_large_board_needs_test_set():
+    with pytest.raises(ValueError):
+        Solver(CFG5)
+    with pytest.raises(ValueError, match='test_set'):
+        Accuracy(CFG5)
+
+
+def test_external_test_set(tmp_path):
+    torch.manual_seed(0)
+    model = AlphaZeroNetwork(CFG5)
+
+    """ 空の盤 (先手番) と1手進めた盤 (後手番)。最善手は中央だけ、または空いている全てのマス """
+    states = np.zeros((2, 5, 5), dtype=np.int64)
+    states[1, 0, 0] = CFG5.first_player
+    best = np.zeros((2, 25), dtype=bool)
+    best[0, 12] = True
+    best[1] = states[1].reshape(-1) == 0
+    values = np.array([0.0, 1.0], dtype=np.float32)
+
+    accuracy = Accuracy(CFG5, test_set=(states, best, values))
+    result = accuracy(model)
+
+    assert result['positions'] == 2
+    assert accuracy.features[0, -1].eq(1).all() and accuracy.features[1, -1].eq(0).all()
+
+    model.eval()
+    with torch.no_grad():
+        p, v = model(accuracy.features)
+    expected = (float(p[0].argmax() == 12) + 1.0) / 2
+    assert result['policy_accuracy'] == pytest.approx(expected)
+    assert result['value_mse'] == pytest.approx((v.reshape(-1) - torch.from_numpy(values)).pow(2).mean().item())
+
+    """ 同じ配列を保存した .npz からも読める """
+    path = str(tmp_path / 'test_set.npz')
+    np.savez(path, states=states, best=best, values=values)
+    assert Accuracy(CFG5, test_set=path)(model)['policy_accuracy'] == result['policy_accuracy']
+
+
+def test_test_set_matches_solver():
+    torch.manual_seed(0)
+    model = AlphaZeroNetwork(CFG)
+
+    accuracy = Accuracy(CFG, num_position=200)
+    states, best, values = accuracy.solve()
+    expected = accuracy(model)
+
+    result = Accuracy(CFG, test_set=(states, best, values))(model)
+    assert result['positions'] == expected['positions'] == 200
+    assert result['policy_accuracy'] == expected['policy_accuracy']
+    assert result['value_mse'] == pytest.approx(expected['value_mse'])
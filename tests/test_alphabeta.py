@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title test_alphabeta
+"""
+AlphaBeta: 手番をまたいで置換表を再利用しても、完全解析表 (Solver) の最善手を指すこと
+
+Usage:
+python -m pytest tests
+"""
+import os
+import sys
+import random
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from AlphaZeroCode.AlphaBeta import AlphaBeta
+from AlphaZeroCode.Solver import Solver
+from AlphaZeroCode.env.TicTacToe import TicTacToe
+
+
+class CFG:
+    board_width = 3
+    action_size = 9
+    history_size = 1
+    first_player = -1
+    second_player = 1
+    solver_path = None
+
+
+def set_position(env, solver, board):
+    env.reset()
+    env.state = [row[:] for row in board]
+    env.player = solver.player(board)
+
+
+def test_shared_engine_plays_optimal_moves():
+    solver = Solver(CFG)
+    env = TicTacToe()
+    engine = AlphaBeta(CFG)
+
+    rng = random.Random(0)
+    for code in rng.sample(list(solver.positions()), 800):
+        board = solver.decode(code)
+        set_position(env, solver, board)
+        action = engine(env)
+        assert solver.is_best(board, action), (board, action)
+        assert env.state == board
+
+    """ 前の手番の置換表が残っていても、唯一の最善手 4 を指す """
+    board = [[-1, 1, 0], [-1, 0, 0], [1, 0, 0]]
+    set_position(env, solver, board)
+    assert engine(env) == 4
+
+
+def test_shared_engine_against_random_player():
+    solver = Solver(CFG)
+    env = TicTacToe()
+    engine = AlphaBeta(CFG)
+    rng = random.Random(1)
+
+    for game in range(100):
+        env.reset()
+        turn = game % 2
+        while not env.done:
+            if turn == 0:
+                action = engine(env)
+                assert solver.is_best(env.state, action), (env.state, action)
+            else:
+                action = int(rng.choice(list(env.get_legal_actions())))
+            env.step(action)
+            turn = 1 - turn
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title test_dataset_log
+"""
+DatasetLog: 壊れたレコードやゴミのバイト列の後ろに追記されたレコードも読めること
+
+Usage:
+python -m pytest tests
+"""
+import os
+import sys
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from AlphaZeroCode.DatasetLog import DatasetLog
+
+
+class CFG:
+    board_width = 3
+    action_size = 9
+    history_size = 1
+
+
+def sample(z):
+    features = np.zeros((3, 3, 3), dtype=np.float32)
+    features[0, 1, 1] = 1
+    pi = np.full(9, 1 / 9, dtype=np.float32)
+    return [features.tolist(), pi.tolist(), [z], None]
+
+
+def append_bytes(path, data):
+    with open(path, 'ab') as f:
+        f.write(data)
+
+
+def test_resync_after_garbage(tmp_path):
+    path = str(tmp_path / 'sub_dataset.log')
+    writer = DatasetLog(CFG, path)
+    reader = DatasetLog(CFG, path)
+
+    writer.append([sample(1)])
+    assert len(reader.read()) == 1
+
+    """ ゴミ2バイトの後に有効なレコード2件 """
+    append_bytes(path, b'\xff\x00')
+    assert reader.read() == []
+    writer.append([sample(-1), sample(0)])
+
+    dataset = reader.read()
+    assert [data[2] for data in dataset] == [[-1], [0]]
+    assert reader.num_corrupt == 1
+    assert reader.skipped_bytes == 2
+
+
+def test_resync_after_torn_record(tmp_path):
+    path = str(tmp_path / 'sub_dataset.log')
+    writer = DatasetLog(CFG, path)
+    writer.append([sample(1)])
+
+    """ 途中で切れたレコードの後に有効なレコード """
+    with open(path, 'rb') as f:
+        record = f.read()
+    append_bytes(path, record[:len(record) // 2])
+
+    reader = DatasetLog(CFG, path)
+    assert len(reader.read()) == 1
+
+    writer.append([sample(-1)])
+    dataset = reader.read()
+    assert [data[2] for data in dataset] == [[-1]]
+    assert reader.num_corrupt == 1
+    assert reader.num_record == 2
+
+
+def test_oversized_length_and_crc_mismatch(tmp_path):
+    path = str(tmp_path / 'sub_dataset.log')
+    writer = DatasetLog(CFG, path)
+    writer.append([sample(1)])
+
+    with open(path, 'rb') as f:
+        record = bytearray(f.read())
+
+    """ 長さが上限を超える枠と、ペイロードが書き換わったレコード """
+    oversized = bytearray(record)
+    oversized[4:8] = (0xffffffff).to_bytes(4, 'little')
+    flipped = bytearray(record)
+    flipped[-1] ^= 0xff
+    append_bytes(path, bytes(oversized[:16]))
+    append_bytes(path, bytes(flipped))
+    writer.append([sample(0)])
+
+    reader = DatasetLog(CFG, path)
+    dataset = reader.read()
+    assert [data[2] for data in dataset] == [[1], [0]]
+    assert reader.num_corrupt == 1
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title test_fused_network
+"""
+FusedAlphaZeroNetwork: BatchNorm を畳み込んだ推論専用モデルの出力が、元のモデル (eval モード) と一致すること
+
+Usage:
+python -m pytest tests
+"""
+import os
+import sys
+import pytest
+import torch
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from AlphaZeroCode.network.AlphaZeroNetwork import AlphaZeroNetwork
+
+
+class CFG:
+    board_width = 5
+    action_size = 25
+    history_size = 2
+    resnet_channels = 16
+    n_residual_block = 2
+    hidden_size = 32
+    device = 'cpu'
+
+
+def randomize_batchnorm(model):
+    """ 学習後のように、BatchNorm の統計量とパラメーターを初期値から動かす """
+    with torch.no_grad():
+        for m in model.modules():
+            if isinstance(m, torch.nn.BatchNorm2d):
+                m.running_mean.uniform_(-0.5, 0.5)
+                m.running_var.uniform_(0.5, 2.0)
+                m.weight.uniform_(0.5, 1.5)
+                m.bias.uniform_(-0.2, 0.2)
+
+
+@pytest.mark.parametrize('batch_size', [1, 32])
+@pytest.mark.parametrize('memory_format', [torch.contiguous_format, torch.channels_last])
+def test_fused_matches_eval(batch_size, memory_format):
+    torch.manual_seed(0)
+    model = AlphaZeroNetwork(CFG)
+    randomize_batchnorm(model)
+    model.eval()
+    fused = model.fuse()
+
+    in_channels = CFG.history_size * 2 + 1
+    x = (torch.rand(batch_size, in_channels, CFG.board_width, CFG.board_width) < 0.3).float()
+    x = x.contiguous(memory_format=memory_format)
+
+    with torch.no_grad():
+        p, v = model(x)
+    p_fused, v_fused = fused(x)
+
+    assert p_fused.shape == p.shape
+    assert v_fused.shape == v.shape
+    assert torch.allclose(p_fused, p, atol=1e-5)
+    assert torch.allclose(v_fused, v, atol=1e-5)
@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title test_inference_server
+"""
+InferenceServer: max_batch_size を超えたバッチを上限の枠に丸めずに数えること
+
+Usage:
+python -m pytest tests
+"""
+import os
+import sys
+import torch
+import torch.nn as nn
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from AlphaZeroCode.InferenceServer import InferenceServer
+
+
+class CFG:
+    device = 'cpu'
+    inference_max_batch_size = 4
+    inference_max_wait = 0.0
+
+
+class Uniform(nn.Module):
+    def forward(self, x):
+        return torch.full((len(x), 9), 1 / 9), torch.zeros(len(x), 1)
+
+
+def test_oversized_batches_are_counted(capsys):
+    with InferenceServer(Uniform(), CFG, num_client=1) as server:
+        client = server.clients[0]
+        p, v = client(torch.zeros(6, 3, 3, 3))
+        assert p.shape == (6, 9)
+        client(torch.zeros(2, 3, 3, 3))
+
+    batch_size_hist, _ = server.stats()
+    assert batch_size_hist == {2: 1, '>4': 1}
+    assert server.overflow_position.value == 6
+
+    server.show_stats()
+    assert 'positions: 8 ' in capsys.readouterr().out
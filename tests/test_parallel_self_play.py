@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title test_parallel_self_play
+"""
+ParallelSelfPlay: CFG.seed を設定しても、同時に進める各局が別の手順になること
+
+Usage:
+python -m pytest tests
+"""
+import os
+import sys
+import torch
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from AlphaZeroCode.ParallelSelfPlay import ParallelSelfPlay
+from AlphaZeroCode.env.TicTacToe import TicTacToe
+from AlphaZeroCode.network.AlphaZeroNetwork import AlphaZeroNetwork
+
+
+class CFG:
+    board_width = 3
+    action_size = 9
+    history_size = 1
+    first_player = -1
+    second_player = 1
+    num_simulation = 8
+    cpuct = 1.25
+    Dirichlet_alpha = 0.3
+    Dirichlet_epsilon = 0.25
+    tau = 1.0
+    tau_limit = 9
+    resnet_channels = 8
+    n_residual_block = 1
+    hidden_size = 16
+    max_dataset_size = 10000
+    device = 'cpu'
+    seed = 0
+
+
+class RecordingSelfPlay(ParallelSelfPlay):
+    """ 終局した局の手順を記録する """
+    def finish_game(self, game):
+        self.records.append(tuple(action for _, action in game['history']))
+        super().finish_game(game)
+
+
+def test_seeded_games_differ():
+    torch.manual_seed(0)
+    self_play = RecordingSelfPlay(CFG, TicTacToe(), AlphaZeroNetwork(CFG), num_game=8)
+    self_play.records = []
+    self_play()
+
+    assert len(self_play.records) == 8
+    assert len(set(self_play.records)) > 1
+
+    """ 次の呼び出しの局も、前の呼び出しの局とは別の乱数列 """
+    first = list(self_play.records)
+    self_play.records = []
+    self_play()
+    assert self_play.records != first
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @title test_self_play_pool
+"""
+SelfPlayPool: ワーカーが終了したら collect() や Pipeline.run() が止まったままにならず RuntimeError になること
+
+Usage:
+python -m pytest tests
+"""
+import os
+import sys
+import time
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from AlphaZeroCode.SelfPlayPool import SelfPlayPool
+from AlphaZeroCode.Pipeline import Pipeline
+from AlphaZeroCode.env.TicTacToe import TicTacToe
+from AlphaZeroCode.network.AlphaZeroNetwork import AlphaZeroNetwork
+
+
+class CFG:
+    board_width = 3
+    action_size = 9
+    history_size = 1
+    first_player = -1
+    second_player = 1
+    num_simulation = 4
+    cpuct = 1.25
+    Dirichlet_alpha = 0.3
+    Dirichlet_epsilon = 0.25
+    tau = 1.0
+    tau_limit = 9
+    resnet_channels = 8
+    n_residual_block = 1
+    hidden_size = 16
+    max_dataset_size = 10000
+    batch_size = 8
+    num_epoch = 1
+    learning_rate = 0.01
+    weight_decay = 1e-4
+    device = 'cpu'
+    num_self_play_worker = 1
+    mp_start_method = 'fork'
+
+
+class BrokenTicTacToe(TicTacToe):
+    """ 着手で例外を出す環境 """
+    def step(self, action):
+        raise ValueError('broken env')
+
+
+class StuckTicTacToe(TicTacToe):
+    """ 対局が始まらない環境 (ワーカーを外から止める) """
+    def step(self, action):
+        time.sleep(3600)
+
+
+def test_worker_error_is_reported():
+    pool = SelfPlayPool(CFG, BrokenTicTacToe(), AlphaZeroNetwork(CFG))
+    pool.start()
+    try:
+        with pytest.raises(RuntimeError, match='broken env'):
+            pool.collect(num_game=1, poll_interval=0.1)
+    finally:
+        pool.close(timeout=1)
+
+
+def test_dead_worker_is_reported():
+    pool = SelfPlayPool(CFG, StuckTicTacToe(), AlphaZeroNetwork(CFG))
+    pool.start()
+    try:
+        pool.workers[0].kill()
+        pool.workers[0].join()
+        with pytest.raises(RuntimeError, match='worker 0'):
+            pool.collect(num_game=1, poll_interval=0.1)
+    finally:
+        pool.close(timeout=1)
+
+
+def test_pipeline_stops_when_workers_die(tmp_path, monkeypatch):
+    monkeypatch.setattr(CFG, 'model_path', str(tmp_path / 'model.pth'), raising=False)
+    pipeline = Pipeline(CFG, StuckTicTacToe(), AlphaZeroNetwork(CFG))
+    pipeline.start()
+    try:
+        for worker in pipeline.pool.workers:
+            worker.kill()
+            worker.join()
+        with pytest.raises(RuntimeError, match='worker 0'):
+            pipeline.run(num_step=1)
+    finally:
+        pipeline.pool.close(timeout=1)